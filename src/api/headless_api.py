@@ -0,0 +1,394 @@
+"""
+无界面API - 供测试脚本通过HTTP/WebSocket获取topic数据和设备状态
+与页面运行在同一个服务上，所有订阅都通过RosTopicHub共享同一个RosBridge连接：
+多个脚本请求同一个topic时只订阅一次，一段时间没有请求后自动取消订阅
+
+接口：
+GET  /api/topics                      topic列表
+GET  /api/topics/latest?topic=/x      最新一帧消息，可选type/filter/timeout
+POST /api/topics/bulk                 一次获取多个topic的最新消息
+GET  /api/status                      ROS/SSH连接、设备遥测、时钟同步和图像缓冲池状态
+WS   /api/stream?topics=/a,/b&rate=10 按限定频率推送选定topic的新消息
+
+访问控制：设置环境变量HEADLESS_API_TOKEN后，请求需在X-API-Token头或token参数中携带该值；
+未设置时只接受本机请求。filter只支持字段提取，不接受'='开头的表达式
+"""
+import os
+import time
+import json
+import base64
+import asyncio
+import threading
+import logging
+from typing import Optional, List, Dict, Any
+
+import numpy as np
+from fastapi import Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from nicegui import app
+
+from ros.ros_bridge import get_ros_bridge
+from ros.topic_hub import get_ros_topic_hub
+from ros.message_filter import MessageFilter
+from ssh.ssh import get_ssh_manager
+from device.telemetry import get_device_telemetry
+from ui_function.image_process import get_pool_stats
+
+
+# API订阅在最后一次使用后保留的时间（秒），供轮询的脚本复用
+SUBSCRIPTION_IDLE_TIMEOUT = 30.0
+# WebSocket推送频率上限（Hz）
+MAX_STREAM_RATE = 30.0
+# 访问令牌，未设置时只允许本机访问
+API_TOKEN = os.environ.get('HEADLESS_API_TOKEN', '')
+LOCAL_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
+
+class ApiSubscriptions:
+    """API持有的共享订阅，按最后使用时间回收"""
+
+    def __init__(self, idle_timeout: float = SUBSCRIPTION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.ros_bridge = get_ros_bridge()
+        self.hub = get_ros_topic_hub()
+        # topic名称 -> 最后使用时间
+        self._last_used: Dict[str, float] = {}
+        # topic名称 -> 正在使用的WebSocket数量，使用中的订阅不回收
+        self._streams: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._reaper_thread = None
+
+    def start_reaper(self):
+        """启动后台回收线程，没有新请求时空闲订阅也会按时取消"""
+        if self._reaper_thread is not None and self._reaper_thread.is_alive():
+            return
+        self._reaper_thread = threading.Thread(target=self._reap_loop, name='api-reaper', daemon=True)
+        self._reaper_thread.start()
+
+    def _reap_loop(self):
+        interval = max(1.0, self.idle_timeout / 3)
+        while True:
+            time.sleep(interval)
+            try:
+                self.reap()
+            except Exception as e:
+                logging.error(f"回收API订阅失败: {e}")
+
+    def resolve_type(self, topic_name: str, topic_type: str = None) -> Optional[str]:
+        """确定topic的消息类型，未指定时依次从已有订阅和rosapi获取"""
+        if topic_type:
+            return topic_type
+        topic_type = self.hub.get_topic_type(topic_name)
+        if topic_type:
+            return topic_type
+        response, = self.ros_bridge.call_services([('/rosapi/topic_type', 'rosapi/TopicType', {'topic': topic_name})])
+        return (response or {}).get('type') or None
+
+    def acquire(self, topic_name: str, topic_type: str = None) -> bool:
+        """确保topic已被API订阅并刷新使用时间
+
+        Returns:
+            bool: 订阅是否可用
+        """
+        self.reap()
+        with self._lock:
+            if topic_name in self._last_used:
+                self._last_used[topic_name] = time.time()
+                return True
+
+        topic_type = self.resolve_type(topic_name, topic_type)
+        if topic_type is None:
+            return False
+        if not self.hub.subscribe(topic_name, topic_type):
+            return False
+
+        with self._lock:
+            if topic_name in self._last_used:
+                # 并发请求已经订阅过，释放本次多出的引用
+                duplicate = True
+            else:
+                duplicate = False
+            self._last_used[topic_name] = time.time()
+        if duplicate:
+            self.hub.unsubscribe(topic_name)
+        return True
+
+    def open_stream(self, topic_name: str, topic_type: str = None) -> bool:
+        """WebSocket开始使用topic"""
+        if not self.acquire(topic_name, topic_type):
+            return False
+        with self._lock:
+            self._streams[topic_name] = self._streams.get(topic_name, 0) + 1
+        return True
+
+    def close_stream(self, topic_name: str):
+        """WebSocket停止使用topic，之后按空闲时间回收"""
+        with self._lock:
+            count = self._streams.get(topic_name, 0) - 1
+            if count > 0:
+                self._streams[topic_name] = count
+            else:
+                self._streams.pop(topic_name, None)
+            if topic_name in self._last_used:
+                self._last_used[topic_name] = time.time()
+
+    def reap(self):
+        """取消超过空闲时间且没有WebSocket使用的订阅"""
+        now = time.time()
+        with self._lock:
+            expired = [name for name, last_used in self._last_used.items()
+                       if now - last_used > self.idle_timeout and name not in self._streams]
+            for name in expired:
+                del self._last_used[name]
+        for name in expired:
+            self.hub.unsubscribe(name)
+
+    def wait_latest(self, topic_name: str, timeout: float, after_seq: int = 0) -> tuple:
+        """等待topic收到序号大于after_seq的消息
+
+        Returns:
+            tuple: (消息, 序号, 接收时间)，超时时返回当前值
+        """
+        deadline = time.time() + timeout
+        while True:
+            latest = self.hub.get_latest(topic_name)
+            if (latest[0] is not None and latest[1] > after_seq) or time.time() >= deadline:
+                return latest
+            time.sleep(0.01)
+
+
+api_subscriptions = ApiSubscriptions()
+app.on_startup(api_subscriptions.start_reaper)
+
+
+def is_client_allowed(client_host: Optional[str], token: Optional[str]) -> bool:
+    """检查客户端是否有权访问API"""
+    if API_TOKEN:
+        return token == API_TOKEN
+    return client_host in LOCAL_HOSTS
+
+
+def check_access(request: Request):
+    token = request.headers.get('X-API-Token') or request.query_params.get('token')
+    if not is_client_allowed(request.client.host if request.client else None, token):
+        raise HTTPException(status_code=403, detail='无权访问API')
+
+
+def parse_filter(spec: Optional[str]) -> Optional[MessageFilter]:
+    """编译请求中的字段过滤规则，表达式过滤只在页面中使用
+
+    Raises:
+        ValueError: 规则格式错误或为表达式
+    """
+    if not spec:
+        return None
+    if spec.lstrip().startswith('='):
+        raise ValueError('API不支持表达式过滤')
+    return MessageFilter(spec)
+
+
+def compile_filter(spec: Optional[str]) -> Optional[MessageFilter]:
+    """编译请求中的字段过滤规则"""
+    try:
+        return parse_filter(spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def encode_frame(topic_name: str, latest: tuple) -> tuple:
+    """将接收进程模式下的BGR图像编码为sensor_msgs/Image格式的字典
+
+    图像是共享内存视图，编码期间可能被接收进程覆盖，覆盖时重新读取最新帧
+    """
+    for _ in range(3):
+        message, seq, receive_time = latest
+        if not isinstance(message, np.ndarray):
+            return latest
+        encoded = {
+            'height': message.shape[0],
+            'width': message.shape[1],
+            'encoding': 'bgr8',
+            'step': message.shape[1] * 3,
+            'data': base64.b64encode(message).decode('utf-8'),
+        }
+        if api_subscriptions.hub.is_frame_intact(topic_name, seq):
+            return encoded, seq, receive_time
+        latest = api_subscriptions.hub.get_latest(topic_name)
+    return None, seq, receive_time
+
+
+def make_topic_result(topic_name: str, latest: tuple, message_filter: Optional[MessageFilter] = None) -> Dict[str, Any]:
+    """将(消息, 序号, 接收时间)转换为返回给客户端的结果"""
+    message, seq, receive_time = encode_frame(topic_name, latest)
+    if message is not None and message_filter is not None:
+        try:
+            message = message_filter(message)
+        except Exception as e:
+            message = {'filter_error': str(e)}
+    return {
+        'topic': topic_name,
+        'type': api_subscriptions.hub.get_topic_type(topic_name),
+        'seq': seq,
+        'receive_time': receive_time if message is not None else None,
+        'age': time.time() - receive_time if message is not None else None,
+        'message': message,
+    }
+
+
+def require_ros():
+    if not api_subscriptions.ros_bridge.ros_is_connected:
+        raise HTTPException(status_code=503, detail='ROS bridge未连接')
+
+
+# FastAPI在线程池中执行普通函数接口，阻塞等待不会影响页面
+
+
+@app.get('/api/topics', dependencies=[Depends(check_access)])
+def api_topics() -> List[Dict[str, str]]:
+    """topic列表"""
+    require_ros()
+    return api_subscriptions.ros_bridge.get_available_topics()
+
+
+@app.get('/api/topics/latest', dependencies=[Depends(check_access)])
+def api_topic_latest(topic: str, topic_type: str = Query(None, alias='type'),
+                     filter_spec: str = Query(None, alias='filter'), timeout: float = 2.0) -> Dict[str, Any]:
+    """topic的最新一帧消息，还没有数据时最多等待timeout秒"""
+    require_ros()
+    message_filter = compile_filter(filter_spec)
+    if not api_subscriptions.acquire(topic, topic_type):
+        raise HTTPException(status_code=404, detail=f"无法订阅topic: {topic}")
+    latest = api_subscriptions.wait_latest(topic, max(0.0, min(timeout, 30.0)))
+    return make_topic_result(topic, latest, message_filter)
+
+
+@app.post('/api/topics/bulk', dependencies=[Depends(check_access)])
+def api_topics_bulk(request: Dict[str, Any]) -> Dict[str, Any]:
+    """一次获取多个topic的最新消息
+
+    请求体: {"topics": ["/a", {"name": "/b", "type": "...", "filter": "..."}], "timeout": 2.0}
+    """
+    require_ros()
+    timeout = max(0.0, min(float(request.get('timeout', 2.0)), 30.0))
+    topics = []
+    for item in request.get('topics', []):
+        if isinstance(item, str):
+            item = {'name': item}
+        if not isinstance(item, dict) or not item.get('name'):
+            raise HTTPException(status_code=400, detail=f"topic格式错误: {item}")
+        topics.append((item['name'], item.get('type'), compile_filter(item.get('filter'))))
+
+    # 未知类型的topic一次并发查询，避免逐个往返
+    unknown = [name for name, topic_type, _ in topics
+               if not topic_type and not api_subscriptions.hub.get_topic_type(name)]
+    responses = api_subscriptions.ros_bridge.call_services(
+        [('/rosapi/topic_type', 'rosapi/TopicType', {'topic': name}) for name in unknown])
+    resolved = {name: (response or {}).get('type') for name, response in zip(unknown, responses)}
+    topics = [(name, topic_type or resolved.get(name), message_filter) for name, topic_type, message_filter in topics]
+
+    acquired = {name: api_subscriptions.acquire(name, topic_type) for name, topic_type, _ in topics}
+    # 所有topic共用同一个截止时间
+    deadline = time.time() + timeout
+    results = {}
+    for name, _, message_filter in topics:
+        if not acquired[name]:
+            results[name] = {'topic': name, 'error': '无法订阅topic'}
+            continue
+        latest = api_subscriptions.wait_latest(name, max(0.0, deadline - time.time()))
+        results[name] = make_topic_result(name, latest, message_filter)
+    return {'topics': results}
+
+
+@app.get('/api/status', dependencies=[Depends(check_access)])
+def api_status() -> Dict[str, Any]:
+    """ROS/SSH连接、设备遥测、时钟同步和图像缓冲池状态"""
+    ros_bridge = api_subscriptions.ros_bridge
+    ssh_manager = get_ssh_manager()
+    return {
+        'ros': {
+            'connected': ros_bridge.ros_is_connected,
+            'host': ros_bridge.ros_host,
+            'port': ros_bridge.ros_port,
+        },
+        'ssh': {
+            'connected': bool(ssh_manager.is_connected),
+            'host': ssh_manager.hostname,
+            'port': ssh_manager.port,
+        },
+        'telemetry': get_device_telemetry().get_latest(),
+        'clock': ros_bridge.get_clock_status(),
+        'subscriptions': api_subscriptions.hub.get_subscribed_topics(),
+        # 解码缓冲池的复用情况：allocations稳定后不应继续增长，unpooled_*为每帧无法复用的分配
+        'image_pools': get_pool_stats(),
+    }
+
+
+@app.websocket('/api/stream')
+async def api_stream(websocket: WebSocket):
+    """按限定频率推送选定topic的新消息
+
+    连接参数: topics=/a,/b&rate=10&filter=...
+    连接后可发送 {"topics": [...], "rate": 5, "filter": "..."} 更改选定的topic
+    每条推送为一个topic的结果，只在该topic有新消息时推送
+    """
+    params = websocket.query_params
+    token = websocket.headers.get('X-API-Token') or params.get('token')
+    if not is_client_allowed(websocket.client.host if websocket.client else None, token):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    loop = asyncio.get_event_loop()
+
+    streams: Dict[str, int] = {}
+    state = {'rate': 10.0, 'filter': None}
+
+    async def configure(topics: List[str], rate: float = None, spec: str = None):
+        if rate is not None:
+            state['rate'] = max(0.1, min(float(rate), MAX_STREAM_RATE))
+        state['filter'] = parse_filter(spec)
+        for name in [name for name in streams if name not in topics]:
+            api_subscriptions.close_stream(name)
+            del streams[name]
+        for name in topics:
+            if name in streams:
+                continue
+            if await loop.run_in_executor(None, api_subscriptions.open_stream, name, None):
+                streams[name] = 0
+            else:
+                await websocket.send_json({'topic': name, 'error': '无法订阅topic'})
+
+    try:
+        topics = [name.strip() for name in params.get('topics', '').split(',') if name.strip()]
+        try:
+            await configure(topics, params.get('rate', 10.0), params.get('filter'))
+        except ValueError as e:
+            await websocket.send_json({'error': f"参数格式错误: {e}"})
+            await websocket.close()
+            return
+
+        while True:
+            for name in streams:
+                latest = api_subscriptions.hub.get_latest(name)
+                # 只推送新消息，慢客户端拿到的总是最新一帧
+                if latest[0] is not None and latest[1] != streams[name]:
+                    result = make_topic_result(name, latest, state['filter'])
+                    # 图像被覆盖重读时结果可能是更新的一帧
+                    streams[name] = result['seq']
+                    await websocket.send_json(result)
+
+            # 等待下一个周期，同时接收客户端的配置更新
+            try:
+                text = await asyncio.wait_for(websocket.receive_text(), timeout=1.0 / state['rate'])
+            except asyncio.TimeoutError:
+                continue
+            try:
+                config = json.loads(text)
+                await configure(config.get('topics', list(streams)), config.get('rate'), config.get('filter'))
+            except (ValueError, AttributeError) as e:
+                await websocket.send_json({'error': f"配置格式错误: {e}"})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logging.error(f"WebSocket推送失败: {e}")
+    finally:
+        for name in streams:
+            api_subscriptions.close_stream(name)
@@ -0,0 +1,322 @@
+"""
+设备遥测采集器 - 通过一个常驻的SSH通道批量采集设备状态
+远端运行一个循环脚本，每个周期一次性读取/proc和/sys，输出按标记分段，
+本地增量解析后写入时间序列，供Device Status卡片显示
+单例模式实现
+"""
+import shlex
+import threading
+import time
+import logging
+from collections import deque
+from typing import Optional, Dict, List, Any
+
+from ssh.ssh import get_ssh_manager
+
+
+# 每个采样周期的分段标记
+SECTION_PREFIX = '@@'
+SECTION_END = '@@END'
+
+# 默认的GPU负载节点（Qualcomm Adreno）
+DEFAULT_GPU_LOAD_PATH = '/sys/class/kgsl/kgsl-3d0/gpu_busy_percentage'
+
+
+def build_telemetry_script(interval: float, gpu_load_path: str, npu_load_path: Optional[str],
+                           disk_path: str) -> str:
+    """生成远端采集脚本，每个周期只产生一次输出
+
+    Args:
+        interval: 采样间隔（秒）
+        gpu_load_path: GPU负载节点路径
+        npu_load_path: NPU负载节点路径（平台相关，可为None）
+        disk_path: 统计磁盘占用的挂载点
+
+    Returns:
+        str: 可直接通过exec_command执行的命令
+    """
+    npu_cmd = f"cat {shlex.quote(npu_load_path)} 2>/dev/null" if npu_load_path else ':'
+    script = (
+        'while :; do '
+        "echo @@CPU; head -n1 /proc/stat; "
+        "echo @@MEM; grep -E '^(MemTotal|MemAvailable):' /proc/meminfo; "
+        "echo @@TEMP; cat /sys/class/thermal/thermal_zone*/temp 2>/dev/null; "
+        f"echo @@GPU; cat {shlex.quote(gpu_load_path)} 2>/dev/null; "
+        f"echo @@NPU; {npu_cmd}; "
+        f"echo @@DISK; df -P {shlex.quote(disk_path)} | tail -n1; "
+        f"echo {SECTION_END}; "
+        f"sleep {interval}; "
+        'done'
+    )
+    return f"sh -c {shlex.quote(script)}"
+
+
+class TelemetrySampleParser:
+    """增量解析采集脚本的输出，每遇到结束标记产生一个采样"""
+
+    def __init__(self):
+        self._section = None
+        self._lines: Dict[str, List[str]] = {}
+        self._prev_cpu = None
+
+    def feed_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """输入一行输出
+
+        Args:
+            line: 去掉换行符的一行文本
+
+        Returns:
+            Optional[Dict[str, Any]]: 完整采样，未结束时返回None
+        """
+        if line == SECTION_END:
+            sample = self._build_sample()
+            self._section = None
+            self._lines = {}
+            return sample
+
+        if line.startswith(SECTION_PREFIX):
+            self._section = line[len(SECTION_PREFIX):]
+            self._lines[self._section] = []
+        elif self._section is not None and line:
+            self._lines[self._section].append(line)
+        return None
+
+    def _build_sample(self) -> Dict[str, Any]:
+        """将一个周期内的分段转换为采样"""
+        sample = {
+            'time': time.time(),
+            'cpu': self._parse_cpu(self._lines.get('CPU', [])),
+            'mem': self._parse_mem(self._lines.get('MEM', [])),
+            'temp': self._parse_temp(self._lines.get('TEMP', [])),
+            'gpu': self._parse_percent(self._lines.get('GPU', [])),
+            'npu': self._parse_percent(self._lines.get('NPU', [])),
+            'disk': self._parse_disk(self._lines.get('DISK', [])),
+        }
+        return sample
+
+    def _parse_cpu(self, lines: List[str]) -> Optional[float]:
+        """根据/proc/stat两次采样之差计算CPU占用率（%）"""
+        if not lines:
+            return None
+        try:
+            fields = [int(v) for v in lines[0].split()[1:]]
+        except ValueError:
+            return None
+        # idle + iowait
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        total = sum(fields)
+        prev = self._prev_cpu
+        self._prev_cpu = (idle, total)
+        if prev is None or total <= prev[1]:
+            return None
+        return 100.0 * (1.0 - (idle - prev[0]) / (total - prev[1]))
+
+    @staticmethod
+    def _parse_mem(lines: List[str]) -> Optional[float]:
+        """解析内存占用率（%）"""
+        values = {}
+        for line in lines:
+            parts = line.split()
+            if len(parts) < 2:
+                continue
+            try:
+                values[parts[0].rstrip(':')] = int(parts[1])
+            except ValueError:
+                continue
+        total = values.get('MemTotal')
+        available = values.get('MemAvailable')
+        if not total or available is None:
+            return None
+        return 100.0 * (1.0 - available / total)
+
+    @staticmethod
+    def _parse_temp(lines: List[str]) -> Optional[float]:
+        """解析所有thermal zone中的最高温度（℃）"""
+        temps = []
+        for line in lines:
+            try:
+                temps.append(int(line.strip()) / 1000.0)
+            except ValueError:
+                continue
+        return max(temps) if temps else None
+
+    @staticmethod
+    def _parse_percent(lines: List[str]) -> Optional[float]:
+        """解析形如 "23 %" 或 "23" 的负载值"""
+        if not lines:
+            return None
+        try:
+            return float(lines[0].replace('%', '').split()[0])
+        except (ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def _parse_disk(lines: List[str]) -> Optional[float]:
+        """解析df -P输出中的磁盘占用率（%）"""
+        if not lines:
+            return None
+        parts = lines[-1].split()
+        if len(parts) < 5:
+            return None
+        try:
+            return float(parts[4].rstrip('%'))
+        except ValueError:
+            return None
+
+
+class DeviceTelemetry:
+    """设备遥测采集器 - 单例模式，一个SSH通道对应一个常驻采集脚本"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, interval: float = 1.0, history_size: int = 120):
+        """初始化遥测采集器
+
+        Args:
+            interval: 采样间隔（秒）
+            history_size: 保留的历史采样数量
+        """
+        # 确保只初始化一次
+        if not DeviceTelemetry._initialized:
+            self.interval = interval
+            self.gpu_load_path = DEFAULT_GPU_LOAD_PATH
+            self.npu_load_path = None
+            self.disk_path = '/'
+            self.ssh_manager = get_ssh_manager()
+            self.channel = None
+            self.history = deque(maxlen=history_size)
+            self._lock = threading.Lock()
+            self._thread = None
+            self._stop_event = threading.Event()
+            DeviceTelemetry._initialized = True
+
+    @property
+    def is_running(self) -> bool:
+        """采集线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """启动采集，如果已在运行则直接返回
+
+        Returns:
+            bool: 是否成功启动
+        """
+        if self.is_running:
+            return True
+
+        command = build_telemetry_script(self.interval, self.gpu_load_path,
+                                         self.npu_load_path, self.disk_path)
+        channel = self.ssh_manager.open_command_channel(command)
+        if channel is None:
+            logging.error("启动设备遥测失败: 无法打开SSH通道")
+            return False
+
+        self.channel = channel
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(channel,),
+                                        name='device-telemetry', daemon=True)
+        self._thread.start()
+        logging.info("设备遥测采集已启动")
+        return True
+
+    def stop(self):
+        """停止采集并关闭通道"""
+        self._stop_event.set()
+        if self.channel is not None:
+            try:
+                self.channel.close()
+            except Exception as e:
+                logging.error(f"关闭遥测通道失败: {e}")
+            finally:
+                self.channel = None
+
+    def _run(self, channel):
+        """后台线程：读取通道输出，通道断开时在SSH仍连接的情况下重新打开"""
+        backoff = 1.0
+        while True:
+            self._read_loop(channel)
+            if self._stop_event.is_set() or not self.ssh_manager.is_connected:
+                break
+            logging.warning(f"设备遥测通道已断开，{backoff:.0f}秒后重新打开")
+            if self._stop_event.wait(backoff):
+                break
+            backoff = min(backoff * 2, 30.0)
+            command = build_telemetry_script(self.interval, self.gpu_load_path,
+                                             self.npu_load_path, self.disk_path)
+            channel = self.ssh_manager.open_command_channel(command)
+            if channel is None:
+                continue
+            self.channel = channel
+            backoff = 1.0
+        self.channel = None
+        logging.info("设备遥测采集已停止")
+
+    def _read_loop(self, channel):
+        """增量读取通道输出并解析，通道关闭或读取失败时返回"""
+        if channel is None:
+            return
+        parser = TelemetrySampleParser()
+        pending = b''
+        channel.settimeout(max(self.interval * 5, 5.0))
+        try:
+            while not self._stop_event.is_set():
+                data = channel.recv(4096)
+                if not data:
+                    break
+                pending += data
+                *lines, pending = pending.split(b'\n')
+                for raw_line in lines:
+                    try:
+                        sample = parser.feed_line(raw_line.decode('utf-8', errors='ignore').strip())
+                    except Exception as e:
+                        # 单个异常输出不应终止采集
+                        logging.warning(f"解析设备遥测输出失败: {e}")
+                        continue
+                    if sample is not None:
+                        with self._lock:
+                            self.history.append(sample)
+        except Exception as e:
+            if not self._stop_event.is_set():
+                logging.error(f"设备遥测读取失败: {e}")
+        finally:
+            try:
+                channel.close()
+            except Exception:
+                pass
+
+    def get_latest(self) -> Optional[Dict[str, Any]]:
+        """获取最新一次采样
+
+        Returns:
+            Optional[Dict[str, Any]]: 最新采样，没有数据时返回None
+        """
+        with self._lock:
+            return self.history[-1] if self.history else None
+
+    def get_series(self, key: str) -> List[tuple]:
+        """获取某一指标的时间序列
+
+        Args:
+            key: 指标名称（cpu/mem/temp/gpu/npu/disk）
+
+        Returns:
+            List[tuple]: (时间戳, 数值) 列表
+        """
+        with self._lock:
+            return [(s['time'], s[key]) for s in self.history if s.get(key) is not None]
+
+
+def get_device_telemetry():
+    """获取设备遥测采集器单例实例
+
+    Returns:
+        DeviceTelemetry: 遥测采集器实例
+    """
+    device_telemetry = DeviceTelemetry()
+    return device_telemetry
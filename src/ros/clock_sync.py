@@ -0,0 +1,179 @@
+"""
+主机-设备时钟同步 - 通过rosapi get_time周期性探测往返时间并估计时钟偏差和漂移
+采用NTP类似的做法：每次探测得到(偏差, 往返时间)，在最近的若干样本中取往返时间最小的作为偏差估计，
+再对过滤后的偏差做线性回归估计漂移，用于修正header.stamp计算的端到端延迟
+"""
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, Any
+
+
+GET_TIME_SERVICE = ('/rosapi/get_time', 'rosapi/GetTime')
+
+
+def stamp_to_seconds(stamp: Dict[str, Any]) -> Optional[float]:
+    """将ROS1/ROS2的时间戳转换为秒
+
+    Args:
+        stamp: {'sec', 'nanosec'} 或 {'secs', 'nsecs'}
+
+    Returns:
+        Optional[float]: 秒，格式不正确时返回None
+    """
+    if not isinstance(stamp, dict):
+        return None
+    if 'sec' in stamp:
+        return stamp['sec'] + stamp.get('nanosec', 0) * 1e-9
+    if 'secs' in stamp:
+        return stamp['secs'] + stamp.get('nsecs', 0) * 1e-9
+    return None
+
+
+class ClockProbe:
+    """时钟探测器，由RosBridge持有"""
+
+    def __init__(self, ros_bridge, interval: float = 2.0, filter_size: int = 8, history_size: int = 64):
+        """初始化探测器
+
+        Args:
+            ros_bridge: RosBridge实例
+            interval: 探测间隔（秒）
+            filter_size: 取最小往返时间的样本窗口
+            history_size: 用于估计漂移的过滤后偏差数量
+        """
+        self.ros_bridge = ros_bridge
+        self.interval = interval
+        self.samples = deque(maxlen=filter_size)
+        self.filtered = deque(maxlen=history_size)
+        self.last_rtt = None
+        self.offset = None
+        self.drift = 0.0
+        self._reference_time = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """探测线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动探测线程"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._probe_loop, name='clock-probe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止探测线程"""
+        self._stop_event.set()
+
+    def reset(self):
+        """清空样本，重新连接到其他设备后调用"""
+        with self._lock:
+            self.samples.clear()
+            self.filtered.clear()
+            self.last_rtt = None
+            self.offset = None
+            self.drift = 0.0
+            self._reference_time = None
+
+    def _probe_loop(self):
+        """后台线程：启动时快速探测几次，之后按固定间隔探测"""
+        probe_count = 0
+        while not self._stop_event.is_set():
+            if self.ros_bridge.ros_is_connected:
+                self.probe_once()
+                probe_count += 1
+            wait = 0.2 if probe_count < 4 else self.interval
+            self._stop_event.wait(wait)
+
+    def probe_once(self) -> bool:
+        """执行一次探测
+
+        Returns:
+            bool: 是否得到有效样本
+        """
+        send_time = time.time()
+        response, = self.ros_bridge.call_services([GET_TIME_SERVICE + ({},)], timeout=max(self.interval, 1.0))
+        receive_time = time.time()
+
+        device_time = stamp_to_seconds((response or {}).get('time'))
+        if device_time is None:
+            return False
+
+        rtt = receive_time - send_time
+        # 假设往返路径对称，设备时间对应请求的中点
+        offset = device_time - (send_time + receive_time) / 2
+        self._add_sample(receive_time, offset, rtt)
+        return True
+
+    def _add_sample(self, sample_time: float, offset: float, rtt: float):
+        """加入样本并更新偏差和漂移估计"""
+        with self._lock:
+            self.last_rtt = rtt
+            self.samples.append((sample_time, offset, rtt))
+
+            # 窗口内往返时间最小的样本受排队延迟影响最小
+            best_time, best_offset, best_rtt = min(self.samples, key=lambda s: s[2])
+            if not self.filtered or self.filtered[-1][0] != best_time:
+                self.filtered.append((best_time, best_offset, best_rtt))
+
+            self.drift = self._estimate_drift()
+            self.offset = best_offset
+            self._reference_time = best_time
+
+    def _estimate_drift(self) -> float:
+        """对过滤后的偏差做最小二乘线性回归，得到漂移（秒/秒）"""
+        if len(self.filtered) < 4:
+            return 0.0
+        min_rtt = min(s[2] for s in self.filtered)
+        points = [(t, o) for t, o, r in self.filtered if r <= 2 * min_rtt + 0.002]
+        # 时间跨度太短时偏差的测量噪声会淹没漂移
+        if len(points) < 4 or points[-1][0] - points[0][0] < 30.0:
+            return 0.0
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_o = sum(o for _, o in points) / len(points)
+        variance = sum((t - mean_t) ** 2 for t, _ in points)
+        return sum((t - mean_t) * (o - mean_o) for t, o in points) / variance
+
+    def get_offset(self, at_time: float = None) -> Optional[float]:
+        """获取某一主机时刻的设备时钟偏差（设备时间 - 主机时间）
+
+        Args:
+            at_time: 主机时间，None表示当前时间
+
+        Returns:
+            Optional[float]: 偏差（秒），还没有样本时返回None
+        """
+        with self._lock:
+            if self.offset is None:
+                return None
+            if at_time is None:
+                at_time = time.time()
+            return self.offset + self.drift * (at_time - self._reference_time)
+
+    def device_to_host_time(self, device_time: float) -> float:
+        """将设备时间换算为主机时间，没有偏差估计时原样返回"""
+        offset = self.get_offset()
+        return device_time - offset if offset is not None else device_time
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取探测状态
+
+        Returns:
+            Dict[str, Any]: 包含rtt、min_rtt、offset（秒）和drift_ppm
+        """
+        with self._lock:
+            min_rtt = min((s[2] for s in self.samples), default=None)
+            last_rtt = self.last_rtt
+            drift = self.drift
+        return {
+            'rtt': last_rtt,
+            'min_rtt': min_rtt,
+            'offset': self.get_offset(),
+            'drift_ppm': drift * 1e6,
+        }
@@ -0,0 +1,485 @@
+"""
+独立的ROS接收进程 - 将订阅、JSON/base64解码和颜色转换移出UI进程
+接收进程有自己的roslibpy连接和GIL，解码后的图像写入共享内存环形缓冲，
+UI进程直接以NumPy视图读取，不复制像素数据；非图像消息通过队列传回。
+监督线程在接收进程崩溃时自动重启，并恢复连接和全部订阅。
+
+通过环境变量 ROS_INGEST_MODE=process 启用，见 ros.topic_hub
+"""
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, Tuple, Callable
+
+import numpy as np
+
+
+IMAGE_TYPES = ('sensor_msgs/msg/Image', 'sensor_msgs/Image')
+
+# 共享内存头部：写入计数；每个槽位：序列状态（写入中为奇数）、帧序号、接收时间
+_HEADER_BYTES = 64
+_SLOT_META_BYTES = 24
+# 旧缓冲停用后延迟释放的时间（秒）
+RING_RELEASE_DELAY = 10.0
+
+
+class SharedFrameRing:
+    """共享内存帧环形缓冲，单写多读，每个槽位用序列计数器（seqlock）标记写入状态
+
+    写入方依次写入各槽位，读取方读取最近写完的槽位并返回视图；
+    视图在写入方绕回该槽位之前有效（slot_count - 1帧），使用完后需用is_intact确认期间没有被覆盖。
+    NumPy不会阻止映射被关闭，关闭后再访问视图会导致进程崩溃，因此读取方延迟关闭旧缓冲。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: tuple, slot_count: int):
+        self.shm = shm
+        self.name = shm.name
+        self.shape = tuple(shape)
+        self.slot_count = slot_count
+
+        self._header = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf, offset=0)
+        meta_offset = _HEADER_BYTES
+        self._state = np.ndarray((slot_count,), dtype=np.uint64, buffer=shm.buf, offset=meta_offset)
+        self._frame_no = np.ndarray((slot_count,), dtype=np.uint64, buffer=shm.buf, offset=meta_offset + 8 * slot_count)
+        self._receive_time = np.ndarray((slot_count,), dtype=np.float64, buffer=shm.buf,
+                                        offset=meta_offset + 16 * slot_count)
+        data_offset = _HEADER_BYTES + _SLOT_META_BYTES * slot_count
+        self._frames = np.ndarray((slot_count,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=data_offset)
+
+    @staticmethod
+    def required_size(shape: tuple, slot_count: int) -> int:
+        return _HEADER_BYTES + (_SLOT_META_BYTES + int(np.prod(shape))) * slot_count
+
+    @classmethod
+    def create(cls, shape: tuple, slot_count: int) -> 'SharedFrameRing':
+        """在接收进程中创建缓冲"""
+        shm = shared_memory.SharedMemory(create=True, size=cls.required_size(shape, slot_count))
+        ring = cls(shm, shape, slot_count)
+        ring._header[0] = 0
+        ring._state[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, shape: tuple, slot_count: int) -> 'SharedFrameRing':
+        """在UI进程中打开接收进程创建的缓冲"""
+        # spawn启动的接收进程与UI进程共用同一个resource_tracker，不需要取消登记；
+        # 接收进程崩溃后遗留的共享内存由IngestProcess在重启时删除
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, slot_count)
+
+    def write(self, frame: np.ndarray, frame_no: int, receive_time: float):
+        """写入一帧（仅接收进程调用）"""
+        index = int(self._header[0]) % self.slot_count
+        self._state[index] += 1
+        np.copyto(self._frames[index], frame)
+        self._frame_no[index] = frame_no
+        self._receive_time[index] = receive_time
+        self._state[index] += 1
+        self._header[0] += 1
+
+    def read_latest(self) -> Optional[Tuple[np.ndarray, int, float]]:
+        """读取最近写完的一帧
+
+        Returns:
+            Optional[Tuple[np.ndarray, int, float]]: (只读视图, 帧序号, 接收时间)，没有数据时返回None
+        """
+        for _ in range(3):
+            count = int(self._header[0])
+            if count == 0:
+                return None
+            index = (count - 1) % self.slot_count
+            state = int(self._state[index])
+            if state % 2:
+                continue
+            frame_no = int(self._frame_no[index])
+            receive_time = float(self._receive_time[index])
+            if int(self._state[index]) != state:
+                continue
+            view = self._frames[index]
+            view.flags.writeable = False
+            return view, frame_no, receive_time
+        return None
+
+    def is_intact(self, frame_no: int) -> bool:
+        """检查read_latest返回的帧是否仍未被覆盖，在使用完视图之后调用
+
+        Args:
+            frame_no: read_latest返回的帧序号
+
+        Returns:
+            bool: 该帧仍完整地保存在原槽位中
+        """
+        for index in range(self.slot_count):
+            state = int(self._state[index])
+            if int(self._frame_no[index]) == frame_no:
+                return state % 2 == 0 and int(self._state[index]) == state
+        return False
+
+    def unlink(self):
+        """删除共享内存，已经删除时忽略"""
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """释放映射，之后不能再访问任何视图"""
+        self._header = self._state = self._frame_no = self._receive_time = self._frames = None
+        self.shm.close()
+
+
+def _ingest_main(command_queue, event_queue, slot_count: int):
+    """接收进程入口"""
+    import roslibpy
+    from ui_function.image_process import process_image_message, ImageBufferPool
+
+    ros = None
+    endpoint = None
+    topics: Dict[str, Dict[str, Any]] = {}
+    # 消息回调在roslibpy的线程中执行，与命令处理互斥
+    lock = threading.Lock()
+
+    def make_handler(topic_name: str):
+        def handler(message):
+            receive_time = time.time()
+            entry = topics.get(topic_name)
+            if entry is None:
+                return
+            entry['frame_no'] += 1
+
+            if not entry['image']:
+                try:
+                    event_queue.put_nowait(('message', topic_name, message, entry['frame_no'], receive_time))
+                except queue.Full:
+                    pass
+                return
+
+            img = process_image_message(message, entry['pool'])
+            if img is None:
+                return
+            with lock:
+                if topics.get(topic_name) is not entry:
+                    return
+                write_frame(topic_name, entry, img, receive_time)
+        return handler
+
+    def write_frame(topic_name: str, entry: Dict[str, Any], img: np.ndarray, receive_time: float):
+        ring = entry['ring']
+        if ring is None or ring.shape != img.shape:
+            # 分辨率变化时换一块新的共享内存，旧的由UI进程释放映射
+            if ring is not None:
+                ring.shm.unlink()
+                ring.close()
+            ring = SharedFrameRing.create(img.shape, slot_count)
+            entry['ring'] = ring
+            event_queue.put(('ring', topic_name, ring.name, img.shape, slot_count))
+        ring.write(img, entry['frame_no'], receive_time)
+
+    def subscribe(topic_name: str, topic_type: str):
+        entry = topics.get(topic_name)
+        if entry is None:
+            entry = {'type': topic_type, 'image': topic_type in IMAGE_TYPES, 'listener': None,
+                     'ring': None, 'pool': ImageBufferPool('ingest'), 'frame_no': 0}
+            topics[topic_name] = entry
+        if ros is not None and ros.is_connected and entry['listener'] is None:
+            listener = roslibpy.Topic(ros, topic_name, topic_type, queue_size=1)
+            listener.subscribe(make_handler(topic_name))
+            entry['listener'] = listener
+
+    def unsubscribe(topic_name: str):
+        with lock:
+            entry = topics.pop(topic_name, None)
+        if entry is None:
+            return
+        if entry['listener'] is not None:
+            entry['listener'].unsubscribe()
+        if entry['ring'] is not None:
+            entry['ring'].shm.unlink()
+            entry['ring'].close()
+
+    def connect():
+        nonlocal ros
+        if ros is not None:
+            try:
+                ros.close()
+            except Exception:
+                pass
+            ros = None
+        for entry in topics.values():
+            entry['listener'] = None
+        try:
+            ros = roslibpy.Ros(*endpoint)
+            ros.run(timeout=1)
+        except Exception as e:
+            event_queue.put(('status', False, str(e)))
+            ros = None
+            return
+        event_queue.put(('status', True, f"{endpoint[0]}:{endpoint[1]}"))
+        for topic_name, entry in list(topics.items()):
+            subscribe(topic_name, entry['type'])
+
+    last_connect_attempt = 0.0
+    while True:
+        try:
+            command = command_queue.get(timeout=1.0)
+        except queue.Empty:
+            command = None
+
+        if command is not None:
+            if command[0] == 'stop':
+                break
+            elif command[0] == 'connect':
+                endpoint = (command[1], command[2])
+                last_connect_attempt = time.time()
+                connect()
+            elif command[0] == 'subscribe':
+                subscribe(command[1], command[2])
+            elif command[0] == 'unsubscribe':
+                unsubscribe(command[1])
+
+        # 连接断开后定期重连
+        if endpoint is not None and (ros is None or not ros.is_connected) and time.time() - last_connect_attempt > 5.0:
+            last_connect_attempt = time.time()
+            connect()
+
+    for topic_name in list(topics):
+        unsubscribe(topic_name)
+    if ros is not None:
+        ros.close()
+
+
+class IngestProcess:
+    """接收进程的管理端（运行在UI进程中）- 单例模式"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, slot_count: int = 4):
+        """初始化管理端
+
+        Args:
+            slot_count: 每个图像topic的共享内存槽位数
+        """
+        # 确保只初始化一次
+        if not IngestProcess._initialized:
+            self.slot_count = slot_count
+            self.restart_count = 0
+            self.connected = False
+            self._context = multiprocessing.get_context('spawn')
+            self._process = None
+            self._spawn_time = 0.0
+            self._command_queue = None
+            self._event_queue = None
+            self._endpoint = None
+            # 返回当前rosbridge地址的函数，监督线程据此跟随RosBridge切换设备
+            self._endpoint_source = None
+            # topic名称 -> {'type', 'ring', 'latest'}
+            self._topics: Dict[str, Dict[str, Any]] = {}
+            # 已被替换的旧缓冲，(替换时间, 缓冲)，等待之前取得的视图用完后再释放
+            self._retired_rings = []
+            self._lock = threading.Lock()
+            self._supervisor = None
+            self._stop_event = threading.Event()
+            IngestProcess._initialized = True
+
+    @property
+    def is_alive(self) -> bool:
+        """接收进程是否在运行"""
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """启动接收进程和监督线程"""
+        if self._supervisor is not None and self._supervisor.is_alive():
+            return
+        self._stop_event.clear()
+        self._spawn()
+        self._supervisor = threading.Thread(target=self._supervise, name='ros-ingest-supervisor', daemon=True)
+        self._supervisor.start()
+
+    def stop(self):
+        """停止接收进程"""
+        self._stop_event.set()
+        if self._process is not None:
+            try:
+                self._command_queue.put(('stop',))
+                self._process.join(timeout=2.0)
+            except Exception:
+                pass
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+    def _spawn(self):
+        """启动接收进程并恢复连接和订阅"""
+        self._command_queue = self._context.Queue()
+        self._event_queue = self._context.Queue(maxsize=256)
+        self._process = self._context.Process(
+            target=_ingest_main,
+            args=(self._command_queue, self._event_queue, self.slot_count),
+            name='ros-ingest',
+            daemon=True,
+        )
+        self._process.start()
+        self._spawn_time = time.time()
+
+        with self._lock:
+            for entry in self._topics.values():
+                if entry['ring'] is not None:
+                    # 旧接收进程已经退出，不会再删除它创建的共享内存
+                    entry['ring'].unlink()
+                self._retire_ring(entry)
+            if self._endpoint is not None:
+                self._command_queue.put(('connect',) + self._endpoint)
+            for topic_name, entry in self._topics.items():
+                self._command_queue.put(('subscribe', topic_name, entry['type']))
+        logging.info(f"ROS接收进程已启动 (pid {self._process.pid})")
+
+    def _supervise(self):
+        """监督线程：处理接收进程的事件，进程退出时按退避时间重启"""
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            try:
+                event = self._event_queue.get(timeout=0.5)
+            except queue.Empty:
+                event = None
+            except Exception:
+                # 进程崩溃时队列可能处于不完整状态
+                event = None
+
+            if event is not None:
+                self._handle_event(event)
+            with self._lock:
+                self._retire_ring({})
+            if self._endpoint_source is not None:
+                ros_host, ros_port = self._endpoint_source()
+                if ros_host:
+                    self.set_endpoint(ros_host, ros_port)
+
+            if self._stop_event.is_set() or self.is_alive:
+                if time.time() - self._spawn_time > 30.0:
+                    backoff = 1.0
+                continue
+
+            logging.error(f"ROS接收进程退出 (exit code {self._process.exitcode})，{backoff:.0f}秒后重启")
+            self.connected = False
+            if self._stop_event.wait(backoff):
+                break
+            backoff = min(backoff * 2, 30.0)
+            self.restart_count += 1
+            self._spawn()
+
+    def _handle_event(self, event: tuple):
+        kind = event[0]
+        if kind == 'ring':
+            _, topic_name, shm_name, shape, slot_count = event
+            with self._lock:
+                entry = self._topics.get(topic_name)
+                if entry is None:
+                    return
+                self._retire_ring(entry)
+                try:
+                    entry['ring'] = SharedFrameRing.attach(shm_name, shape, slot_count)
+                except FileNotFoundError:
+                    # 已被接收进程替换，等待下一个事件
+                    entry['ring'] = None
+        elif kind == 'message':
+            _, topic_name, message, frame_no, receive_time = event
+            entry = self._topics.get(topic_name)
+            if entry is not None:
+                entry['latest'] = (message, frame_no, receive_time)
+        elif kind == 'status':
+            _, self.connected, detail = event
+            if self.connected:
+                logging.info(f"ROS接收进程已连接 {detail}")
+            else:
+                logging.error(f"ROS接收进程连接失败: {detail}")
+
+    def _retire_ring(self, entry: Dict[str, Any]):
+        """停用topic当前的缓冲，并释放停用超过RING_RELEASE_DELAY的旧缓冲"""
+        now = time.time()
+        if entry.get('ring') is not None:
+            self._retired_rings.append((now, entry['ring']))
+            entry['ring'] = None
+        while self._retired_rings and now - self._retired_rings[0][0] > RING_RELEASE_DELAY:
+            self._retired_rings.pop(0)[1].close()
+
+    def set_endpoint(self, ros_host: str, ros_port: int):
+        """设置rosbridge地址，地址变化时接收进程重新连接"""
+        endpoint = (ros_host, ros_port)
+        if endpoint == self._endpoint:
+            return
+        self._endpoint = endpoint
+        if self._command_queue is not None:
+            self._command_queue.put(('connect',) + endpoint)
+
+    def set_endpoint_source(self, source: Callable[[], Tuple[str, int]]):
+        """设置rosbridge地址的来源，地址变化时由监督线程调用set_endpoint"""
+        self._endpoint_source = source
+
+    def subscribe(self, topic_name: str, topic_type: str):
+        """在接收进程中订阅topic"""
+        with self._lock:
+            if topic_name not in self._topics:
+                self._topics[topic_name] = {'type': topic_type, 'ring': None, 'latest': (None, 0, 0.0)}
+        self._command_queue.put(('subscribe', topic_name, topic_type))
+
+    def unsubscribe(self, topic_name: str):
+        """在接收进程中取消订阅topic"""
+        with self._lock:
+            entry = self._topics.pop(topic_name, None)
+            if entry is not None:
+                self._retire_ring(entry)
+        self._command_queue.put(('unsubscribe', topic_name))
+
+    def get_latest(self, topic_name: str) -> Tuple[Any, int, float]:
+        """获取topic的最新数据
+
+        Returns:
+            Tuple[Any, int, float]: (数据, 序号, 接收时间)；图像topic的数据为BGR图像的只读共享内存视图，
+                使用完后需用is_frame_intact确认；其他topic为消息字典；没有数据时为(None, 0, 0.0)
+        """
+        with self._lock:
+            entry = self._topics.get(topic_name)
+            if entry is None:
+                return None, 0, 0.0
+            if entry['ring'] is not None:
+                latest = entry['ring'].read_latest()
+                return latest if latest is not None else (None, 0, 0.0)
+            return entry['latest']
+
+    def is_frame_intact(self, topic_name: str, frame_no: int) -> bool:
+        """检查get_latest返回的数据在使用期间是否没有被接收进程覆盖
+
+        Args:
+            topic_name: topic名称
+            frame_no: get_latest返回的序号
+
+        Returns:
+            bool: 数据仍然有效；缓冲已被替换或帧已被覆盖时返回False，应重新读取
+        """
+        with self._lock:
+            entry = self._topics.get(topic_name)
+            if entry is None:
+                return False
+            if entry['ring'] is not None:
+                return entry['ring'].is_intact(frame_no)
+            # 非图像消息是独立的字典，不会被覆盖
+            return entry['latest'][1] == frame_no
+
+
+def get_ingest_process():
+    """获取接收进程管理端单例实例
+
+    Returns:
+        IngestProcess: 管理端实例
+    """
+    ingest_process = IngestProcess()
+    return ingest_process
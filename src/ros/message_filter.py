@@ -0,0 +1,370 @@
+"""
+消息字段过滤器 - 在接收消息时只保留关心的字段
+支持两种写法，都只在设置时编译一次：
+1. 字段路径，逗号分隔，例如 "pose.position, header.stamp, ranges[0]"
+2. 表达式，以 "=" 开头，消息以msg引用，例如 "= msg['pose']['position']['x'] * 100"
+   或 "= math.hypot(msg.twist.linear.x, msg.twist.linear.y)"；
+   表达式不使用eval，而是解析为语法树后只允许白名单内的节点：
+   msg的下标/属性访问（都按字段取值）、常量、算术/比较/逻辑运算和下列函数。
+   过滤在接收线程中执行，因此算术运算只接受数值和NumPy数组（加法另可拼接同类序列），
+   整数结果限制位数，sum/min/max只接受数值序列，math只开放固定的函数列表
+"""
+import re
+import ast
+import math
+import operator
+from typing import List, Dict, Any, Callable, Union
+
+import numpy as np
+
+
+_PATH_TOKEN = re.compile(r'([^.\[\]\s]+)|\[(-?\d+)\]')
+
+# 整数运算结果的最大位数，避免一个过滤规则占满接收线程
+_MAX_INT_BITS = 4096
+
+
+def _is_numeric(value) -> bool:
+    """数值或NumPy数值数组"""
+    if isinstance(value, np.ndarray):
+        return value.dtype != object
+    return isinstance(value, (int, float, np.number))
+
+
+def _check_result(value):
+    if isinstance(value, int) and value.bit_length() > _MAX_INT_BITS:
+        raise ValueError("数值过大")
+    return value
+
+
+def _numeric_sequence(values):
+    """sum/min/max的参数：NumPy数组或只包含数值的列表/元组"""
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return values
+    if isinstance(values, (list, tuple)) and all(_is_numeric(v) and not isinstance(v, np.ndarray) for v in values):
+        return values
+    raise TypeError("只能对数值序列使用sum/min/max")
+
+
+def _numeric(function: Callable) -> Callable:
+    """只接受数值参数的二元运算"""
+    def apply(left, right):
+        if not (_is_numeric(left) and _is_numeric(right)):
+            raise TypeError(f"运算只支持数值: {type(left).__name__}, {type(right).__name__}")
+        return _check_result(function(left, right))
+    return apply
+
+
+def _add(left, right):
+    # 同类序列可以拼接，长度受输入和表达式本身限制
+    if isinstance(left, (str, list, tuple)) and type(left) is type(right):
+        return left + right
+    return _numeric(operator.add)(left, right)
+
+
+def _power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 \
+            and max(base.bit_length(), 1) * exponent > _MAX_INT_BITS:
+        raise ValueError("数值过大")
+    return operator.pow(base, exponent)
+
+
+def _sum(values):
+    values = _numeric_sequence(values)
+    return values.sum() if isinstance(values, np.ndarray) else _check_result(sum(values))
+
+
+def _min(*values):
+    values = _numeric_sequence(values[0] if len(values) == 1 else values)
+    return values.min() if isinstance(values, np.ndarray) else min(values)
+
+
+def _max(*values):
+    values = _numeric_sequence(values[0] if len(values) == 1 else values)
+    return values.max() if isinstance(values, np.ndarray) else max(values)
+
+
+def _unary_numeric(function: Callable) -> Callable:
+    def apply(*values):
+        if not all(_is_numeric(value) for value in values):
+            raise TypeError("只支持数值参数")
+        return function(*values)
+    return apply
+
+
+# 表达式中可用的函数
+_EXPRESSION_NAMES = {
+    'abs': _unary_numeric(abs),
+    'min': _min,
+    'max': _max,
+    'len': len,
+    'sum': _sum,
+    'round': _unary_numeric(round),
+}
+
+# 可调用的math函数，不包含factorial/comb/perm/prod等运算量随参数增长的函数
+_MATH_FUNCTIONS = {
+    name: _unary_numeric(getattr(math, name)) for name in (
+        'sqrt', 'hypot', 'exp', 'log', 'log10', 'log2', 'pow', 'fabs', 'floor', 'ceil', 'trunc',
+        'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'atan2', 'degrees', 'radians',
+        'copysign', 'isnan', 'isinf', 'isfinite',
+    )
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: _add,
+    ast.Sub: _numeric(operator.sub),
+    ast.Mult: _numeric(operator.mul),
+    ast.Div: _numeric(operator.truediv),
+    ast.FloorDiv: _numeric(operator.floordiv),
+    # 字符串上的%是格式化，只允许数值取模
+    ast.Mod: _numeric(operator.mod),
+    ast.Pow: _numeric(_power),
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Not: operator.not_,
+}
+
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+def _check_name(name: str):
+    if name.startswith('_'):
+        raise ValueError(f"表达式中不允许访问: {name}")
+
+
+def _get_field(value, key):
+    """按字段取值，字段不存在时返回None"""
+    try:
+        return value[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _compile_node(node: ast.AST) -> Callable[[Dict[str, Any]], Any]:
+    """将白名单内的语法树节点编译为求值函数
+
+    Raises:
+        ValueError: 出现白名单以外的节点或访问下划线开头的名称
+    """
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, str) and node.value.startswith('__'):
+            raise ValueError(f"表达式中不允许访问: {node.value}")
+        value = node.value
+        return lambda message: value
+
+    if isinstance(node, ast.Name):
+        _check_name(node.id)
+        if node.id == 'msg':
+            return lambda message: message
+        raise ValueError(f"表达式中只能使用msg和函数调用: {node.id}")
+
+    if isinstance(node, ast.Attribute):
+        _check_name(node.attr)
+        # math模块的常量，例如math.pi
+        if isinstance(node.value, ast.Name) and node.value.id == 'math':
+            value = getattr(math, node.attr, None)
+            if not isinstance(value, (int, float)):
+                raise ValueError(f"不支持的math属性: {node.attr}")
+            return lambda message: value
+        # 消息上的属性访问按字段取值，msg.pose.position 等同于 msg['pose']['position']
+        target = _compile_node(node.value)
+        key = node.attr
+        return lambda message: _get_field(target(message), key)
+
+    if isinstance(node, ast.Subscript):
+        target = _compile_node(node.value)
+        index = _compile_node(node.slice)
+        return lambda message: _get_field(target(message), index(message))
+
+    if isinstance(node, ast.Slice):
+        parts = [_compile_node(part) if part is not None else None for part in (node.lower, node.upper, node.step)]
+        return lambda message: slice(*(part(message) if part is not None else None for part in parts))
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = [_compile_node(item) for item in node.elts]
+        factory = list if isinstance(node, ast.List) else tuple
+        return lambda message: factory(item(message) for item in items)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        function = _BINARY_OPERATORS[type(node.op)]
+        return lambda message: function(left(message), right(message))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        operand = _compile_node(node.operand)
+        function = _UNARY_OPERATORS[type(node.op)]
+        return lambda message: function(operand(message))
+
+    if isinstance(node, ast.BoolOp):
+        values = [_compile_node(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def evaluate_and(message):
+                result = True
+                for value in values:
+                    result = value(message)
+                    if not result:
+                        return result
+                return result
+            return evaluate_and
+
+        def evaluate_or(message):
+            result = False
+            for value in values:
+                result = value(message)
+                if result:
+                    return result
+            return result
+        return evaluate_or
+
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARE_OPERATORS for op in node.ops):
+        left = _compile_node(node.left)
+        comparisons = [(_COMPARE_OPERATORS[type(op)], _compile_node(right))
+                       for op, right in zip(node.ops, node.comparators)]
+
+        def evaluate_compare(message):
+            current = left(message)
+            for function, right in comparisons:
+                value = right(message)
+                if not function(current, value):
+                    return False
+                current = value
+            return True
+        return evaluate_compare
+
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = _compile_node(node.test), _compile_node(node.body), _compile_node(node.orelse)
+        return lambda message: body(message) if test(message) else orelse(message)
+
+    if isinstance(node, ast.Call) and not node.keywords:
+        function = _resolve_function(node.func)
+        arguments = [_compile_node(argument) for argument in node.args]
+        return lambda message: function(*(argument(message) for argument in arguments))
+
+    raise ValueError(f"表达式中不支持的语法: {type(node).__name__}")
+
+
+def _resolve_function(node: ast.AST) -> Callable:
+    """解析可调用的函数：列出的内置函数或math模块中列出的函数"""
+    if isinstance(node, ast.Name) and node.id in _EXPRESSION_NAMES:
+        return _EXPRESSION_NAMES[node.id]
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 'math' \
+            and node.attr in _MATH_FUNCTIONS:
+        return _MATH_FUNCTIONS[node.attr]
+    raise ValueError(f"表达式中不允许调用: {ast.unparse(node)}")
+
+
+def compile_field_path(path: str) -> Callable[[Dict[str, Any]], Any]:
+    """将字段路径编译为取值函数
+
+    Args:
+        path: 字段路径，例如 "pose.position.x" 或 "ranges[0]"
+
+    Returns:
+        Callable[[Dict[str, Any]], Any]: 取值函数，字段不存在时返回None
+
+    Raises:
+        ValueError: 路径格式错误
+    """
+    keys: List[Union[str, int]] = []
+    position = 0
+    for match in _PATH_TOKEN.finditer(path):
+        separator = path[position:match.start()]
+        if (separator not in ('', '.')) if keys else separator.strip():
+            raise ValueError(f"字段路径格式错误: {path}")
+        keys.append(match.group(1) if match.group(1) is not None else int(match.group(2)))
+        position = match.end()
+    if not keys or path[position:].strip():
+        raise ValueError(f"字段路径格式错误: {path}")
+
+    def getter(message):
+        value = message
+        for key in keys:
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return value
+
+    return getter
+
+
+class MessageFilter:
+    """编译后的消息过滤器，可直接作为函数调用"""
+
+    def __init__(self, spec: str):
+        """编译过滤规则
+
+        Args:
+            spec: 字段路径列表或以 "=" 开头的表达式
+
+        Raises:
+            ValueError: 规则格式错误
+        """
+        self.spec = spec.strip()
+        self.paths: List[str] = []
+        if self.spec.startswith('='):
+            expression = self.spec[1:].strip()
+            try:
+                tree = ast.parse(expression, '<message filter>', 'eval')
+            except SyntaxError as e:
+                raise ValueError(f"表达式格式错误: {e.msg}")
+            # 先整体检查双下划线名称，任何位置出现都直接拒绝
+            for node in ast.walk(tree):
+                name = getattr(node, 'attr', None) or getattr(node, 'id', None)
+                if isinstance(name, str) and name.startswith('__'):
+                    raise ValueError(f"表达式中不允许访问: {name}")
+            evaluate = _compile_node(tree)
+
+            def apply(message):
+                return {'value': evaluate(message)}
+        else:
+            self.paths = [path.strip() for path in self.spec.split(',') if path.strip()]
+            getters = [(path, compile_field_path(path)) for path in self.paths]
+
+            def apply(message):
+                return {path: getter(message) for path, getter in getters}
+
+        self._apply = apply
+
+    def __call__(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """对消息应用过滤
+
+        Args:
+            message: 原始消息
+
+        Returns:
+            Dict[str, Any]: 只包含投影结果的字典
+        """
+        return self._apply(message)
+
+    def unknown_paths(self, field_paths: List[Dict[str, str]]) -> List[str]:
+        """检查哪些路径不在消息定义中
+
+        Args:
+            field_paths: MessageSchema.field_paths
+
+        Returns:
+            List[str]: 消息定义中不存在的路径
+        """
+        known = set()
+        for field in field_paths:
+            # 每个叶子路径的所有前缀都是合法路径
+            parts = field['path'].replace('[]', '').split('.')
+            for i in range(1, len(parts) + 1):
+                known.add('.'.join(parts[:i]))
+        return [path for path in self.paths if re.sub(r'\[-?\d+\]', '', path) not in known]
@@ -0,0 +1,381 @@
+"""
+消息定义缓存 - 通过rosapi获取消息定义并持久化到磁盘
+按rosbridge地址、类型和定义哈希缓存，已知类型不再需要往返；
+同一地址的定义每次运行在后台重新校验一次，消息与定义不符时重新获取；
+由定义编译出每个类型的解码器（数组字段转为NumPy数组）、字段路径和文本渲染器
+单例模式实现
+"""
+import os
+import time
+import json
+import base64
+import hashlib
+import threading
+import logging
+from typing import Optional, List, Dict, Any, Callable
+
+import numpy as np
+
+from ros.ros_bridge import get_ros_bridge
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'qualcomm_robotics_sdk_tools',
+                                  'message_schemas.json')
+
+# 基本类型对应的NumPy数据类型
+PRIMITIVE_DTYPES = {
+    'bool': np.bool_,
+    'int8': np.int8,
+    'uint8': np.uint8,
+    'byte': np.uint8,
+    'octet': np.uint8,
+    'char': np.uint8,
+    'int16': np.int16,
+    'uint16': np.uint16,
+    'int32': np.int32,
+    'uint32': np.uint32,
+    'int64': np.int64,
+    'uint64': np.uint64,
+    'float32': np.float32,
+    'float64': np.float64,
+}
+
+# rosbridge将这些类型的数组编码为base64字符串
+BASE64_ARRAY_TYPES = {'uint8', 'byte', 'octet', 'char'}
+
+STRING_TYPES = {'string', 'wstring'}
+
+# 数组在文本渲染时最多展开的元素数量
+MAX_RENDERED_ELEMENTS = 8
+
+# 同一类型两次自动重新获取之间的最短间隔（秒），避免定义持续不符时反复请求
+REFETCH_INTERVAL = 30.0
+
+
+def normalize_type_name(type_name: str) -> str:
+    """统一类型名，ROS2的 "pkg/msg/Type" 与 "pkg/Type" 视为同一类型"""
+    return type_name.replace('/msg/', '/')
+
+
+def definition_hash(typedefs: List[Dict[str, Any]]) -> str:
+    """计算消息定义的哈希"""
+    canonical = json.dumps(typedefs, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class MessageSchema:
+    """编译后的消息定义"""
+
+    def __init__(self, type_name: str, typedefs: List[Dict[str, Any]]):
+        """由rosapi的typedefs编译消息定义
+
+        Args:
+            type_name: 消息类型
+            typedefs: rosapi message_details返回的typedefs，第一个为根类型
+        """
+        self.type_name = type_name
+        self.hash = definition_hash(typedefs)
+        self._typedefs = {normalize_type_name(t['type']): t for t in typedefs}
+        self._root = normalize_type_name(typedefs[0]['type']) if typedefs else normalize_type_name(type_name)
+        self._decoders: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        self.field_paths = self._collect_field_paths(self._root, '')
+        self.decode = self._compile_decoder(self._root)
+
+    def _fields(self, type_key: str) -> List[tuple]:
+        typedef = self._typedefs.get(type_key)
+        if typedef is None:
+            return []
+        return list(zip(typedef['fieldnames'], typedef['fieldtypes'], typedef['fieldarraylen']))
+
+    def _collect_field_paths(self, type_key: str, prefix: str, depth: int = 0) -> List[Dict[str, str]]:
+        """递归收集叶子字段路径，数组字段以[]标记"""
+        paths = []
+        if depth > 16:
+            return paths
+        for name, field_type, array_len in self._fields(type_key):
+            path = f"{prefix}{name}"
+            nested = normalize_type_name(field_type)
+            if array_len != -1:
+                paths.append({'path': f"{path}[]", 'type': f"{field_type}[]"})
+            elif nested in self._typedefs:
+                paths.extend(self._collect_field_paths(nested, f"{path}.", depth + 1))
+            else:
+                paths.append({'path': path, 'type': field_type})
+        return paths
+
+    def _compile_decoder(self, type_key: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """为一个类型生成解码函数，只处理需要转换的字段"""
+        if type_key in self._decoders:
+            return self._decoders[type_key]
+
+        # 先占位以支持递归类型
+        steps: List[tuple] = []
+
+        def decode(message: Dict[str, Any]) -> Dict[str, Any]:
+            if not steps or not isinstance(message, dict):
+                return message
+            decoded = dict(message)
+            for field_name, convert in steps:
+                value = decoded.get(field_name)
+                if value is not None:
+                    decoded[field_name] = convert(value)
+            return decoded
+
+        self._decoders[type_key] = decode
+
+        for name, field_type, array_len in self._fields(type_key):
+            nested = normalize_type_name(field_type)
+            if array_len != -1 and field_type in PRIMITIVE_DTYPES:
+                steps.append((name, self._make_array_converter(field_type)))
+            elif nested in self._typedefs:
+                nested_decode = self._compile_decoder(nested)
+                if array_len != -1:
+                    steps.append((name, lambda values, d=nested_decode: [d(v) for v in values]))
+                else:
+                    steps.append((name, nested_decode))
+        return decode
+
+    @staticmethod
+    def _make_array_converter(field_type: str) -> Callable[[Any], np.ndarray]:
+        """基本类型数组转为NumPy数组，字节数组直接从base64解码"""
+        dtype = PRIMITIVE_DTYPES[field_type]
+        if field_type in BASE64_ARRAY_TYPES:
+            def convert(value):
+                if isinstance(value, str):
+                    return np.frombuffer(base64.b64decode(value), dtype=np.uint8)
+                return np.asarray(value, dtype=np.uint8)
+        else:
+            def convert(value):
+                return np.asarray(value, dtype=dtype)
+        return convert
+
+    def matches(self, message: Dict[str, Any]) -> bool:
+        """检查消息的字段是否与定义一致，不一致说明设备上的消息定义已变化"""
+        if not isinstance(message, dict):
+            return False
+        return set(message) == {name for name, _, _ in self._fields(self._root)}
+
+    @property
+    def render_kind(self) -> str:
+        """根据字段结构决定渲染方式
+
+        Returns:
+            str: image（图像）、text（单个字符串字段）或tree（通用结构）
+        """
+        names = {name: field_type for name, field_type, _ in self._fields(self._root)}
+        if {'height', 'width', 'encoding', 'data'} <= names.keys():
+            return 'image'
+        if list(names) == ['data'] and names['data'] in STRING_TYPES:
+            return 'text'
+        return 'tree'
+
+    def render_text(self, message: Dict[str, Any]) -> str:
+        """渲染为缩进文本，数组只显示形状、类型和部分元素
+
+        Args:
+            message: 原始或已解码的消息
+
+        Returns:
+            str: 渲染结果
+        """
+        lines: List[str] = []
+        self._render_value(self.decode(message), 0, lines, None)
+        return '\n'.join(lines)
+
+    def _render_value(self, value: Any, indent: int, lines: List[str], name: Optional[str]):
+        pad = '  ' * indent
+        label = f"{pad}{name}: " if name is not None else pad
+        if isinstance(value, dict):
+            if name is not None:
+                lines.append(f"{pad}{name}:")
+            for key, item in value.items():
+                self._render_value(item, indent + (1 if name is not None else 0), lines, key)
+        elif isinstance(value, np.ndarray):
+            head = ', '.join(str(v) for v in value[:MAX_RENDERED_ELEMENTS].tolist())
+            more = ', ...' if value.size > MAX_RENDERED_ELEMENTS else ''
+            stats = ''
+            if value.size and value.dtype != np.bool_:
+                stats = f" min={value.min()} max={value.max()}"
+            lines.append(f"{label}{value.dtype}[{value.size}] [{head}{more}]{stats}")
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            lines.append(f"{label}[{len(value)} items]")
+            for index, item in enumerate(value[:MAX_RENDERED_ELEMENTS]):
+                self._render_value(item, indent + 1, lines, f"[{index}]")
+        else:
+            lines.append(f"{label}{value}")
+
+
+class MessageSchemaCache:
+    """消息定义缓存 - 单例模式，内存和磁盘两级缓存"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH):
+        """初始化缓存并从磁盘加载已知定义
+
+        Args:
+            cache_path: 磁盘缓存文件路径
+        """
+        # 确保只初始化一次
+        if not MessageSchemaCache._initialized:
+            self.cache_path = cache_path
+            self.ros_bridge = get_ros_bridge()
+            # rosbridge地址 -> (类型 -> 定义哈希)，定义哈希 -> typedefs
+            # 不同设备的发行版或自定义消息版本可能不同，类型映射按地址区分
+            self._type_hashes: Dict[str, Dict[str, str]] = {}
+            self._definitions: Dict[str, List[Dict[str, Any]]] = {}
+            # 编译结果按定义哈希共享
+            self._compiled: Dict[str, MessageSchema] = {}
+            self._pending = set()
+            # 本次运行中已经从rosapi校验过的(地址, 类型)，以及最近一次发起获取的时间
+            self._validated = set()
+            self._fetch_times: Dict[tuple, float] = {}
+            self._lock = threading.Lock()
+            self._load()
+            MessageSchemaCache._initialized = True
+
+    def _load(self):
+        """从磁盘加载缓存"""
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            # 旧格式的类型映射不区分设备，直接丢弃
+            self._type_hashes = data.get('endpoints', {})
+            self._definitions = data.get('definitions', {})
+            logging.info(f"从磁盘加载了 {len(self._definitions)} 个消息定义")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取消息定义缓存失败: {e}")
+
+    def _save(self):
+        """原子地写入磁盘缓存"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'endpoints': self._type_hashes, 'definitions': self._definitions}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logging.warning(f"写入消息定义缓存失败: {e}")
+
+    def _endpoint(self) -> str:
+        """当前rosbridge地址，作为类型映射的键"""
+        return f"{self.ros_bridge.ros_host}:{self.ros_bridge.ros_port}"
+
+    def get_schema(self, type_name: str, fetch: bool = True) -> Optional[MessageSchema]:
+        """获取消息定义，缓存未命中时通过rosapi获取
+
+        磁盘缓存命中但本次运行尚未校验时，直接返回缓存并在后台重新获取
+
+        Args:
+            type_name: 消息类型
+            fetch: 未命中时是否同步请求rosapi
+
+        Returns:
+            Optional[MessageSchema]: 编译后的消息定义，不可用时返回None
+        """
+        endpoint = self._endpoint()
+        with self._lock:
+            def_hash = self._type_hashes.get(endpoint, {}).get(type_name)
+            schema = None
+            if def_hash is not None:
+                schema = self._compiled.get(def_hash)
+                if schema is None and def_hash in self._definitions:
+                    schema = MessageSchema(type_name, self._definitions[def_hash])
+                    self._compiled[def_hash] = schema
+            validated = (endpoint, type_name) in self._validated
+        if schema is not None:
+            if not validated:
+                self.prefetch(type_name)
+            return schema
+
+        if not fetch:
+            return None
+        return self.refresh(type_name)
+
+    def refresh(self, type_name: str) -> Optional[MessageSchema]:
+        """从rosapi重新获取消息定义并更新缓存
+
+        Args:
+            type_name: 消息类型
+
+        Returns:
+            Optional[MessageSchema]: 编译后的消息定义，失败时返回None
+        """
+        endpoint = self._endpoint()
+        response, = self.ros_bridge.call_services(
+            [('/rosapi/message_details', 'rosapi/MessageDetails', {'type': type_name})]
+        )
+        typedefs = (response or {}).get('typedefs')
+        if not typedefs:
+            logging.warning(f"获取消息定义 {type_name} 失败")
+            return None
+
+        schema = MessageSchema(type_name, typedefs)
+        with self._lock:
+            self._type_hashes.setdefault(endpoint, {})[type_name] = schema.hash
+            self._validated.add((endpoint, type_name))
+            self._definitions[schema.hash] = typedefs
+            self._compiled[schema.hash] = schema
+            self._save()
+        logging.info(f"已缓存消息定义 {type_name} ({schema.hash[:8]})")
+        return schema
+
+    def prefetch(self, type_name: str, force: bool = False):
+        """在后台线程中获取未缓存或本次运行尚未校验的消息定义，不阻塞调用方
+
+        Args:
+            type_name: 消息类型
+            force: 是否忽略REFETCH_INTERVAL立即获取
+        """
+        key = (self._endpoint(), type_name)
+        now = time.time()
+        with self._lock:
+            if key in self._validated or type_name in self._pending:
+                return
+            if not force and now - self._fetch_times.get(key, 0.0) < REFETCH_INTERVAL:
+                return
+            self._fetch_times[key] = now
+            self._pending.add(type_name)
+
+        def run():
+            try:
+                self.refresh(type_name)
+            finally:
+                with self._lock:
+                    self._pending.discard(type_name)
+
+        threading.Thread(target=run, name=f'schema-fetch-{type_name}', daemon=True).start()
+
+    def invalidate(self, type_name: str = None, force: bool = False):
+        """使当前设备上的消息定义失效并在后台重新获取，获取成功前仍使用旧定义
+
+        Args:
+            type_name: 消息类型，None表示当前设备的所有类型
+            force: 是否忽略REFETCH_INTERVAL立即获取，用于用户手动刷新
+        """
+        endpoint = self._endpoint()
+        with self._lock:
+            type_hashes = self._type_hashes.get(endpoint, {})
+            type_names = [type_name] if type_name is not None else list(type_hashes)
+            for name in type_names:
+                self._validated.discard((endpoint, name))
+        for name in type_names:
+            self.prefetch(name, force)
+
+
+def get_message_schema_cache():
+    """获取消息定义缓存单例实例
+
+    Returns:
+        MessageSchemaCache: 消息定义缓存实例
+    """
+    message_schema_cache = MessageSchemaCache()
+    return message_schema_cache
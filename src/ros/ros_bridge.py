@@ -3,8 +3,12 @@ ROS桥接器 - 管理ROS连接
 提供ROS连接的基础功能，一个桥接器可以对应多个topic和service
 """
 import roslibpy
+import time
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+from typing import Optional, List, Dict, Any, Tuple
+
+from ros.clock_sync import ClockProbe, stamp_to_seconds
 
 
 class RosBridge:
@@ -29,6 +33,7 @@ class RosBridge:
             self.ros_host = ros_host
             self.ros_port = ros_port
             self.ros_client = None
+            self.clock_probe = ClockProbe(self)
             RosBridge._initialized = True
     
     def update_host_port(self, ros_host: str, ros_port: int = 9090) -> bool:
@@ -44,6 +49,8 @@ class RosBridge:
         if self.ros_host != ros_host or self.ros_port != ros_port:
             self.ros_host = ros_host
             self.ros_port = ros_port
+            # 换了设备，之前的时钟样本不再有效
+            self.clock_probe.reset()
             # 如果已经连接，需要断开重新连接
             if self.ros_client is not None:
                 self.disconnect_ros_bridge()
@@ -78,6 +85,7 @@ class RosBridge:
             
                 if self.ros_client.is_connected:
                     logging.info(f"Connected to ROS at {self.ros_host}:{self.ros_port}")
+                    self.clock_probe.start()
                     return True
             
             logging.error("Failed to connect to ROS")
@@ -115,6 +123,16 @@ class RosBridge:
             logging.warning("ROS未连接，无法获取topic列表")
             return []
         
+        # rosapi的topics服务一次返回全部名称和类型，只需一次往返
+        response, = self.call_services([('/rosapi/topics', 'rosapi/Topics', {})])
+        if response is not None and len(response.get('topics', [])) == len(response.get('types', [])):
+            topic_list = [{
+                'name': topic_name,
+                'type': topic_type if topic_type else 'unknown'
+            } for topic_name, topic_type in zip(response['topics'], response['types'])]
+            logging.info(f"获取到 {len(topic_list)} 个topic")
+            return topic_list
+        
         try:
             # 使用roslibpy官方API获取topic列表
             topic_names = self.ros_client.get_topics()
@@ -142,6 +160,86 @@ class RosBridge:
             logging.error(f"获取topic列表失败: {e}")
             return []
     
+    def call_services(self, calls: List[Tuple[str, str, Dict[str, Any]]],
+                      timeout: float = 5.0) -> List[Optional[Dict[str, Any]]]:
+        """并发调用多个ROS service，所有请求一次性发出后统一等待结果
+
+        Args:
+            calls: (service名称, service类型, 请求参数) 列表
+            timeout: 等待全部结果的超时时间（秒）
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: 与calls顺序一致的结果，失败或超时的项为None
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        if not calls:
+            return results
+
+        if not self.ros_is_connected:
+            logging.warning("ROS未连接，无法调用service")
+            return results
+
+        remaining = [len(calls)]
+        lock = threading.Lock()
+        all_done = threading.Event()
+
+        def finish():
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    all_done.set()
+
+        def make_callbacks(index: int, service_name: str):
+            def on_success(response):
+                results[index] = dict(response)
+                finish()
+
+            def on_error(error):
+                logging.warning(f"调用service {service_name} 失败: {error}")
+                finish()
+
+            return on_success, on_error
+
+        for index, (service_name, service_type, request) in enumerate(calls):
+            on_success, on_error = make_callbacks(index, service_name)
+            try:
+                service = roslibpy.Service(self.ros_client, service_name, service_type)
+                service.call(roslibpy.ServiceRequest(request), on_success, on_error)
+            except Exception as e:
+                on_error(e)
+
+        if not all_done.wait(timeout):
+            logging.warning(f"批量调用service超时，{remaining[0]}/{len(calls)} 个未返回")
+        return list(results)
+
+    def get_clock_status(self) -> Dict[str, Any]:
+        """获取往返时间和主机-设备时钟偏差
+
+        Returns:
+            Dict[str, Any]: 包含rtt、min_rtt、offset（秒）和drift_ppm，尚无数据的项为None
+        """
+        return self.clock_probe.get_status()
+
+    def get_message_latency(self, stamp: Dict[str, Any], receive_time: float = None) -> Optional[float]:
+        """根据消息的header.stamp计算经过时钟偏差修正的端到端延迟
+
+        Args:
+            stamp: 消息头中的时间戳
+            receive_time: 主机接收时间，None表示当前时间
+
+        Returns:
+            Optional[float]: 延迟（秒），时间戳无效或尚未估计出偏差时返回None
+        """
+        device_time = stamp_to_seconds(stamp)
+        if device_time is None:
+            return None
+        if receive_time is None:
+            receive_time = time.time()
+        offset = self.clock_probe.get_offset(receive_time)
+        if offset is None:
+            return None
+        return receive_time - (device_time - offset)
+
     def get_ros_client(self):
         """获取ROS客户端实例
         
@@ -0,0 +1,250 @@
+"""
+ROS Graph浏览器 - 通过rosapi发现service和参数，并读写参数
+同类请求批量并发发出，结果缓存并在超时、重连或写参数后失效
+单例模式实现
+"""
+import json
+import time
+import threading
+import logging
+from typing import Optional, List, Dict, Any
+
+from ros.ros_bridge import get_ros_bridge
+
+
+class RosGraphBrowser:
+    """ROS service/参数浏览器 - 单例模式"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, cache_ttl: float = 30.0, timeout: float = 5.0):
+        """初始化浏览器
+
+        Args:
+            cache_ttl: 缓存有效期（秒）
+            timeout: 单批service调用的超时时间（秒）
+        """
+        # 确保只初始化一次
+        if not RosGraphBrowser._initialized:
+            self.cache_ttl = cache_ttl
+            self.timeout = timeout
+            self.ros_bridge = get_ros_bridge()
+            self._cache: Dict[str, tuple] = {}
+            self._cache_endpoint = None
+            # 最近一次获取中失败或超时的项，{'services': [...], 'params': [...]}
+            self.last_errors: Dict[str, List[str]] = {'services': [], 'params': []}
+            self._lock = threading.Lock()
+            RosGraphBrowser._initialized = True
+
+    def _get_cached(self, key: str, refresh: bool):
+        """读取缓存，连接的设备变化后全部失效"""
+        endpoint = (self.ros_bridge.ros_host, self.ros_bridge.ros_port, id(self.ros_bridge.ros_client))
+        with self._lock:
+            if endpoint != self._cache_endpoint:
+                self._cache.clear()
+                self._cache_endpoint = endpoint
+            cached = self._cache.get(key)
+        if cached and not refresh and time.time() - cached[0] < self.cache_ttl:
+            return cached[1]
+        return None
+
+    def _set_cached(self, key: str, value):
+        with self._lock:
+            self._cache[key] = (time.time(), value)
+
+    def invalidate(self, key: str = None):
+        """使缓存失效
+
+        Args:
+            key: 缓存项（services/nodes/params），None表示全部
+        """
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def get_nodes(self, refresh: bool = False) -> List[str]:
+        """获取所有节点名称
+
+        Args:
+            refresh: 是否忽略缓存
+
+        Returns:
+            List[str]: 节点名称列表
+        """
+        cached = self._get_cached('nodes', refresh)
+        if cached is not None:
+            return cached
+
+        response, = self.ros_bridge.call_services([('/rosapi/nodes', 'rosapi/Nodes', {})], self.timeout)
+        if response is None:
+            return []
+        nodes = sorted(response.get('nodes', []))
+        self._set_cached('nodes', nodes)
+        return nodes
+
+    def get_services(self, refresh: bool = False) -> List[Dict[str, str]]:
+        """获取所有service及其类型，类型查询批量并发发出
+
+        Args:
+            refresh: 是否忽略缓存
+
+        Returns:
+            List[Dict[str, str]]: service列表，每个元素包含name和type
+        """
+        cached = self._get_cached('services', refresh)
+        if cached is not None:
+            return cached
+
+        response, = self.ros_bridge.call_services([('/rosapi/services', 'rosapi/Services', {})], self.timeout)
+        if response is None:
+            return []
+        names = sorted(response.get('services', []))
+
+        type_responses = self.ros_bridge.call_services(
+            [('/rosapi/service_type', 'rosapi/ServiceType', {'service': name}) for name in names],
+            self.timeout
+        )
+        services = [{
+            'name': name,
+            'type': 'error' if type_response is None else (type_response.get('type') or 'unknown')
+        } for name, type_response in zip(names, type_responses)]
+
+        # 有查询失败或超时时不缓存，下次重新获取
+        failed = [name for name, type_response in zip(names, type_responses) if type_response is None]
+        self.last_errors['services'] = failed
+        logging.info(f"获取到 {len(services)} 个service")
+        if failed:
+            logging.warning(f"{len(failed)} 个service类型查询失败，结果未缓存")
+        else:
+            self._set_cached('services', services)
+        return services
+
+    def get_parameters(self, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """获取所有节点的参数，一次获取全部参数名后批量并发读取参数值
+
+        Args:
+            refresh: 是否忽略缓存
+
+        Returns:
+            Dict[str, Dict[str, Any]]: {节点名称: {参数名: 参数值}}
+        """
+        cached = self._get_cached('params', refresh)
+        if cached is not None:
+            return cached
+
+        response, = self.ros_bridge.call_services([('/rosapi/get_param_names', 'rosapi/GetParamNames', {})],
+                                                  self.timeout)
+        if response is None:
+            return {}
+        full_names = response.get('names', [])
+
+        value_responses = self.ros_bridge.call_services(
+            [('/rosapi/get_param', 'rosapi/GetParam', {'name': name, 'default_value': ''}) for name in full_names],
+            self.timeout
+        )
+
+        parameters: Dict[str, Dict[str, Any]] = {}
+        failed = []
+        for full_name, value_response in zip(full_names, value_responses):
+            # 读取失败的参数不放入结果，避免被当作有效值显示
+            if value_response is None:
+                failed.append(full_name)
+                continue
+            node, param = self.split_param_name(full_name)
+            parameters.setdefault(node, {})[param] = self._decode_value(value_response.get('value'))
+
+        # 有读取失败或超时时不缓存，下次重新获取
+        self.last_errors['params'] = failed
+        logging.info(f"获取到 {len(parameters)} 个节点的 {len(full_names) - len(failed)} 个参数")
+        if failed:
+            logging.warning(f"{len(failed)} 个参数读取失败，结果未缓存")
+        else:
+            self._set_cached('params', parameters)
+        return parameters
+
+    def get_param(self, node: str, param: str) -> Optional[Any]:
+        """读取单个参数（不使用缓存）
+
+        Args:
+            node: 节点名称
+            param: 参数名
+
+        Returns:
+            Optional[Any]: 参数值，失败时返回None
+        """
+        response, = self.ros_bridge.call_services(
+            [('/rosapi/get_param', 'rosapi/GetParam', {'name': self.join_param_name(node, param), 'default_value': ''})],
+            self.timeout
+        )
+        if response is None:
+            return None
+        return self._decode_value(response.get('value'))
+
+    def set_param(self, node: str, param: str, value: Any) -> bool:
+        """设置参数，成功后同步更新缓存
+
+        Args:
+            node: 节点名称
+            param: 参数名
+            value: 参数值
+
+        Returns:
+            bool: 是否成功
+        """
+        response, = self.ros_bridge.call_services(
+            [('/rosapi/set_param', 'rosapi/SetParam', {'name': self.join_param_name(node, param),
+                                                       'value': json.dumps(value)})],
+            self.timeout
+        )
+        if response is None:
+            logging.error(f"设置参数 {node}:{param} 失败")
+            return False
+
+        with self._lock:
+            cached = self._cache.get('params')
+            if cached:
+                cached[1].setdefault(node, {})[param] = value
+        return True
+
+    @staticmethod
+    def split_param_name(full_name: str) -> tuple:
+        """拆分rosapi参数名，ROS2格式为 "/node:param"，ROS1没有节点前缀"""
+        if ':' in full_name:
+            node, param = full_name.split(':', 1)
+            return node, param
+        return '/', full_name
+
+    @staticmethod
+    def join_param_name(node: str, param: str) -> str:
+        """拼接rosapi参数名"""
+        if node == '/':
+            return param
+        return f"{node}:{param}"
+
+    @staticmethod
+    def _decode_value(raw_value: Optional[str]) -> Any:
+        """rosapi以JSON字符串返回参数值"""
+        if raw_value is None or raw_value == '':
+            return None
+        try:
+            return json.loads(raw_value)
+        except ValueError:
+            return raw_value
+
+
+def get_ros_graph_browser():
+    """获取ROS Graph浏览器单例实例
+
+    Returns:
+        RosGraphBrowser: 浏览器实例
+    """
+    ros_graph_browser = RosGraphBrowser()
+    return ros_graph_browser
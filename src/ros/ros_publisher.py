@@ -0,0 +1,310 @@
+"""
+ROS发布器 - 复用已advertise的roslibpy.Topic发布消息
+遥控发布：UI输入只更新最新指令，由固定频率的发布线程合并发送，
+超时没有新输入时自动发送零速度（deadman），并统计输入到发出的延迟
+单例模式实现
+"""
+import math
+import time
+import threading
+import logging
+from collections import deque
+from typing import Optional, Dict, Any
+
+import roslibpy
+
+from ros.ros_bridge import get_ros_bridge
+
+
+TWIST_TYPE = 'geometry_msgs/msg/Twist'
+POSE_STAMPED_TYPE = 'geometry_msgs/msg/PoseStamped'
+
+
+class RosPublisher:
+    """ROS发布器 - 单例模式，按(topic名称, 类型)缓存已advertise的发布者"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """初始化发布器"""
+        # 确保只初始化一次
+        if not RosPublisher._initialized:
+            self.ros_bridge = get_ros_bridge()
+            self.publishers: Dict[tuple, roslibpy.Topic] = {}
+            self._ros_client = None
+            self._lock = threading.Lock()
+            RosPublisher._initialized = True
+
+    def get_publisher(self, topic_name: str, topic_type: str) -> Optional[roslibpy.Topic]:
+        """获取（必要时创建并advertise）发布者
+
+        Args:
+            topic_name: topic名称
+            topic_type: 消息类型
+
+        Returns:
+            Optional[roslibpy.Topic]: 发布者，ROS未连接时返回None
+        """
+        if not self.ros_bridge.ros_is_connected:
+            return None
+
+        with self._lock:
+            # 重新连接后旧的发布者全部失效
+            if self._ros_client is not self.ros_bridge.ros_client:
+                self.publishers.clear()
+                self._ros_client = self.ros_bridge.ros_client
+
+            key = (topic_name, topic_type)
+            publisher = self.publishers.get(key)
+            if publisher is None:
+                publisher = roslibpy.Topic(self.ros_bridge.ros_client, topic_name, topic_type,
+                                           queue_size=1, latch=False)
+                publisher.advertise()
+                self.publishers[key] = publisher
+                logging.info(f"advertise {topic_name} ({topic_type})")
+            return publisher
+
+    def publish(self, topic_name: str, topic_type: str, message: Dict[str, Any]) -> bool:
+        """发布一条消息
+
+        Args:
+            topic_name: topic名称
+            topic_type: 消息类型
+            message: 消息内容
+
+        Returns:
+            bool: 是否成功发出
+        """
+        try:
+            publisher = self.get_publisher(topic_name, topic_type)
+            if publisher is None:
+                return False
+            publisher.publish(roslibpy.Message(message))
+            return True
+        except Exception as e:
+            logging.error(f"发布 {topic_name} 失败: {e}")
+            return False
+
+    def unadvertise_all(self):
+        """取消所有发布者"""
+        with self._lock:
+            for publisher in self.publishers.values():
+                try:
+                    publisher.unadvertise()
+                except Exception as e:
+                    logging.error(f"unadvertise {publisher.name} 失败: {e}")
+            self.publishers.clear()
+
+
+def make_twist(linear_x: float, angular_z: float) -> Dict[str, Any]:
+    """生成geometry_msgs/Twist消息"""
+    return {
+        'linear': {'x': float(linear_x), 'y': 0.0, 'z': 0.0},
+        'angular': {'x': 0.0, 'y': 0.0, 'z': float(angular_z)},
+    }
+
+
+class TeleopController:
+    """遥控发布控制器 - 单例模式
+
+    set_command只记录最新指令；发布线程按固定频率发送，
+    空闲时收到的输入立即发送，连续输入则合并到下一个发布周期
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, topic_name: str = '/cmd_vel', rate_hz: float = 50.0, deadman_timeout: float = 0.5):
+        """初始化遥控控制器
+
+        Args:
+            topic_name: 速度指令topic
+            rate_hz: 发布频率
+            deadman_timeout: 超过该时间（秒）没有新输入则发送零速度
+        """
+        # 确保只初始化一次
+        if not TeleopController._initialized:
+            self.topic_name = topic_name
+            self.rate_hz = rate_hz
+            self.deadman_timeout = deadman_timeout
+            self.publisher = RosPublisher()
+            self.latencies = deque(maxlen=200)
+            self.publish_count = 0
+            self._command = (0.0, 0.0)
+            self._command_time = 0.0
+            self._pending = False
+            self._active = False
+            self._last_publish_time = 0.0
+            self._lock = threading.Lock()
+            self._wakeup = threading.Event()
+            self._stop_event = threading.Event()
+            self._thread = None
+            TeleopController._initialized = True
+
+    @property
+    def period(self) -> float:
+        """发布周期（秒）"""
+        return 1.0 / self.rate_hz
+
+    @property
+    def is_running(self) -> bool:
+        """发布线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动发布线程"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._publish_loop, name='teleop-publisher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """发送零速度并停止发布线程"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.publisher.publish(self.topic_name, TWIST_TYPE, make_twist(0.0, 0.0))
+        self._active = False
+
+    def set_command(self, linear_x: float, angular_z: float):
+        """更新速度指令，连续调用会被合并
+
+        Args:
+            linear_x: 线速度（m/s）
+            angular_z: 角速度（rad/s）
+        """
+        with self._lock:
+            was_active = self._active
+            self._command = (linear_x, angular_z)
+            self._command_time = time.perf_counter()
+            self._pending = True
+            self._active = True
+        # 发布线程空闲时在无限期等待，必须唤醒；它会自己等到下一个周期再发送。
+        # 活动时距离上次发布已超过一个周期才需要立即唤醒
+        if not was_active or self._command_time - self._last_publish_time >= self.period:
+            self._wakeup.set()
+
+    def keepalive(self):
+        """刷新当前指令的时间，避免摇杆保持不动时触发deadman超时
+
+        由浏览器在摇杆按住期间定时调用，浏览器断开后心跳停止，deadman仍然生效
+        """
+        with self._lock:
+            if self._active:
+                self._command_time = time.perf_counter()
+
+    def _publish_loop(self):
+        """后台线程：固定频率发布最新指令，处理deadman超时"""
+        while not self._stop_event.is_set():
+            # 没有活动指令时一直等待新输入
+            next_slot = self._last_publish_time + self.period
+            self._wakeup.wait(max(0.0, next_slot - time.perf_counter()) if self._active else None)
+            self._wakeup.clear()
+            if self._stop_event.is_set():
+                break
+
+            now = time.perf_counter()
+            # 唤醒过早（输入过于频繁）时等到下一个周期再合并发送
+            if now < self._last_publish_time + self.period:
+                continue
+
+            with self._lock:
+                command, command_time, pending, active = self._command, self._command_time, self._pending, self._active
+                self._pending = False
+
+            if not active:
+                self._last_publish_time = now
+                continue
+
+            if now - command_time > self.deadman_timeout:
+                # 输入超时，发送零速度并停止持续发布
+                self.publisher.publish(self.topic_name, TWIST_TYPE, make_twist(0.0, 0.0))
+                with self._lock:
+                    if self._command_time == command_time:
+                        self._active = False
+                self._last_publish_time = now
+                logging.info("遥控输入超时，已发送零速度")
+                continue
+
+            if self.publisher.publish(self.topic_name, TWIST_TYPE, make_twist(*command)):
+                sent_time = time.perf_counter()
+                self.publish_count += 1
+                if pending:
+                    self.latencies.append(sent_time - command_time)
+            self._last_publish_time = now
+
+    def get_latency_stats(self) -> Dict[str, float]:
+        """获取输入到发出的延迟统计（毫秒）
+
+        Returns:
+            Dict[str, float]: 包含last/mean/p95/max
+        """
+        samples = sorted(self.latencies)
+        if not samples:
+            return {'last': 0.0, 'mean': 0.0, 'p95': 0.0, 'max': 0.0}
+        return {
+            'last': self.latencies[-1] * 1000,
+            'mean': sum(samples) / len(samples) * 1000,
+            'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            'max': samples[-1] * 1000,
+        }
+
+
+def send_goal(x: float, y: float, yaw: float, frame_id: str = 'map', topic_name: str = '/goal_pose') -> bool:
+    """发布导航目标点
+
+    Args:
+        x: 目标x坐标（m）
+        y: 目标y坐标（m）
+        yaw: 目标朝向（rad）
+        frame_id: 坐标系
+        topic_name: 目标topic
+
+    Returns:
+        bool: 是否成功发出
+    """
+    now = time.time()
+    message = {
+        'header': {
+            'stamp': {'sec': int(now), 'nanosec': int((now % 1) * 1e9)},
+            'frame_id': frame_id,
+        },
+        'pose': {
+            'position': {'x': float(x), 'y': float(y), 'z': 0.0},
+            'orientation': {'x': 0.0, 'y': 0.0, 'z': math.sin(yaw / 2), 'w': math.cos(yaw / 2)},
+        },
+    }
+    return RosPublisher().publish(topic_name, POSE_STAMPED_TYPE, message)
+
+
+def get_ros_publisher():
+    """获取ROS发布器单例实例
+
+    Returns:
+        RosPublisher: 发布器实例
+    """
+    ros_publisher = RosPublisher()
+    return ros_publisher
+
+
+def get_teleop_controller():
+    """获取遥控控制器单例实例
+
+    Returns:
+        TeleopController: 遥控控制器实例
+    """
+    teleop_controller = TeleopController()
+    return teleop_controller
@@ -2,10 +2,23 @@
 ROS Topic订阅器 - 管理topic订阅
 提供topic订阅和消息接收功能，只保留最新一帧数据
 单例模式实现，确保只有一个topic订阅器实例
+
+接收进程模式（ROS_INGEST_MODE=process）下图像topic通过RosTopicHub在接收进程中订阅和解码，
+最新消息为共享内存中BGR图像的只读视图，由轮询线程更新
 """
+import time
+import threading
 import roslibpy
 import logging
 from ros.ros_bridge import get_ros_bridge
+from ros.message_schema import get_message_schema_cache
+from ros.message_filter import MessageFilter
+from ros.topic_hub import INGEST_MODE, get_ros_topic_hub
+from ros.ingest_process import IMAGE_TYPES
+
+
+# 接收进程模式下检查新图像的间隔（秒）
+INGEST_POLL_INTERVAL = 0.005
 
 
 class RosTopic:
@@ -15,6 +28,13 @@ class RosTopic:
     cls_latest_message = None
     cls_current_topic_name = None
     cls_current_topic_type = None
+    # 最新消息所使用的字段过滤规则，None表示完整消息
+    cls_current_filter = None
+    # 最新消息的接收时间（主机时间）和header.stamp，过滤前记录，用于计算端到端延迟
+    cls_latest_receive_time = None
+    cls_latest_stamp = None
+    # (最新消息, 序号)，整体替换；接收进程模式下用序号确认共享内存中的图像在使用期间未被覆盖
+    cls_latest_frame = (None, 0)
     
     # 单例模式相关变量
     _instance = None
@@ -39,6 +59,12 @@ class RosTopic:
             self.ros_bridge = get_ros_bridge()
             self.listener = None
             self.is_subscribed = False
+            # 额外的消息监听函数（如录像），在接收线程中调用，不能阻塞
+            self.message_listeners = []
+            self.message_filter = None
+            # 接收进程模式下订阅的图像topic，以及对应轮询线程的停止事件
+            self.ingest_hub = None
+            self._poll_stop_event = None
             RosTopic._initialized = True
     
     def update_topic(self, topic_name: str, topic_message_type: str) -> bool:
@@ -60,9 +86,10 @@ class RosTopic:
             logging.info(f"取消订阅当前topic: {self.topic_name}")
             self.unsubscribe()
         
-        # 更新topic信息
+        # 更新topic信息，字段过滤只对原topic有效
         self.topic_name = topic_name
         self.topic_message_type = topic_message_type
+        self.message_filter = None
         
         # 如果之前已经订阅过，重新订阅新的topic
         if self.topic_name and self.topic_message_type:
@@ -77,13 +104,85 @@ class RosTopic:
         Args:
             message: 接收到的消息
         """
+        receive_time = time.time()
+        header = message.get('header') if isinstance(message, dict) else None
+        stamp = header.get('stamp') if isinstance(header, dict) else None
+        
+        # 设置了字段过滤时只保留投影结果，监听函数（录像等）仍收到原始消息
+        raw_message = message
+        message_filter = self.message_filter
+        if message_filter is not None:
+            try:
+                message = message_filter(message)
+            except Exception as e:
+                message = {'filter_error': str(e)}
         
         # 更新最新消息和相关信息
         RosTopic.cls_latest_message = message
+        RosTopic.cls_latest_frame = (message, RosTopic.cls_latest_frame[1] + 1)
         RosTopic.cls_current_topic_name = self.topic_name
         RosTopic.cls_current_topic_type = self.topic_message_type
+        RosTopic.cls_current_filter = message_filter.spec if message_filter is not None else None
+        RosTopic.cls_latest_receive_time = receive_time
+        RosTopic.cls_latest_stamp = stamp
         print(f"接收到{self.topic_name}消息")
 
+        for listener in list(self.message_listeners):
+            try:
+                listener(raw_message)
+            except Exception as e:
+                logging.error(f"消息监听函数处理失败: {e}")
+
+    def set_message_filter(self, spec: str = None) -> tuple[bool, str]:
+        """设置字段过滤规则，规则只在此处编译一次
+
+        Args:
+            spec: 字段路径列表或以 "=" 开头的表达式，为空时取消过滤
+
+        Returns:
+            tuple[bool, str]: (是否成功, 消息)
+        """
+        if not spec or not spec.strip():
+            self.message_filter = None
+            return True, '已取消字段过滤'
+        if self.ingest_hub is not None:
+            return False, '接收进程模式下图像topic不支持字段过滤'
+
+        try:
+            message_filter = MessageFilter(spec)
+        except ValueError as e:
+            return False, str(e)
+
+        message = f"字段过滤已设置: {message_filter.spec}"
+        # 有消息定义时检查路径是否存在
+        schema = get_message_schema_cache().get_schema(self.topic_message_type, fetch=False) \
+            if self.topic_message_type else None
+        if schema is not None:
+            unknown = message_filter.unknown_paths(schema.field_paths)
+            if unknown:
+                message += f"（消息定义中不存在: {', '.join(unknown)}）"
+
+        self.message_filter = message_filter
+        return True, message
+
+    def add_message_listener(self, listener):
+        """添加消息监听函数
+
+        Args:
+            listener: 接收消息的回调函数，在接收线程中调用，不能阻塞；收到的是未经字段过滤的原始消息
+        """
+        if listener not in self.message_listeners:
+            self.message_listeners.append(listener)
+
+    def remove_message_listener(self, listener):
+        """移除消息监听函数
+
+        Args:
+            listener: 之前添加的回调函数
+        """
+        if listener in self.message_listeners:
+            self.message_listeners.remove(listener)
+
     def subscribe(self) -> bool:
         """订阅当前设置的topic
         
@@ -107,6 +206,9 @@ class RosTopic:
         if self.is_subscribed:
             logging.warning(f"Topic {self.topic_name} 已经订阅")
             return True
+
+        if INGEST_MODE == 'process' and self.topic_message_type in IMAGE_TYPES:
+            return self._subscribe_ingest()
         
         try:
             # 设置queue_size=1确保只保留最新消息
@@ -120,6 +222,9 @@ class RosTopic:
             # 订阅topic，传递消息处理函数
             self.listener.subscribe(self.message_handler)
             
+            # 后台获取消息定义，已缓存的类型不会产生任何请求
+            get_message_schema_cache().prefetch(self.topic_message_type)
+            
             self.is_subscribed = True
             logging.info(f"成功订阅 {self.topic_name}")
             return True
@@ -127,12 +232,82 @@ class RosTopic:
             logging.error(f"订阅 {self.topic_name} 失败: {e}")
             return False
     
+    def _subscribe_ingest(self) -> bool:
+        """通过RosTopicHub在接收进程中订阅图像topic，并启动轮询线程"""
+        hub = get_ros_topic_hub()
+        if not hub.subscribe(self.topic_name, self.topic_message_type):
+            logging.error(f"订阅 {self.topic_name} 失败 (接收进程)")
+            return False
+        self.ingest_hub = hub
+        self._poll_stop_event = threading.Event()
+        threading.Thread(target=self._poll_ingest, args=(hub, self.topic_name, self._poll_stop_event),
+                         name=f'ingest-poll-{self.topic_name}', daemon=True).start()
+        self.is_subscribed = True
+        return True
+
+    def _poll_ingest(self, hub, topic_name: str, stop_event: threading.Event):
+        """轮询线程：接收进程有新图像时更新最新消息，并把图像的副本交给监听函数"""
+        last_seq = 0
+        last_image = None
+        while not stop_event.wait(INGEST_POLL_INTERVAL):
+            image, seq, receive_time = hub.get_latest(topic_name)
+            if image is None or seq == last_seq:
+                continue
+            last_seq = seq
+            last_image = image
+
+            RosTopic.cls_current_topic_name = topic_name
+            RosTopic.cls_current_topic_type = self.topic_message_type
+            RosTopic.cls_current_filter = None
+            RosTopic.cls_latest_receive_time = receive_time
+            RosTopic.cls_latest_stamp = None
+            RosTopic.cls_latest_message = image
+            RosTopic.cls_latest_frame = (image, seq)
+
+            if not self.message_listeners:
+                continue
+            # 监听函数（录像等）在其他线程中稍后使用图像，复制一份避免被接收进程覆盖
+            frame = image.copy()
+            if not hub.is_frame_intact(topic_name, seq):
+                continue
+            for listener in list(self.message_listeners):
+                try:
+                    listener(frame)
+                except Exception as e:
+                    logging.error(f"消息监听函数处理失败: {e}")
+
+        # 取消订阅后共享内存会在延迟后关闭，不能再保留其中的视图
+        if RosTopic.cls_latest_message is last_image:
+            RosTopic._clear_latest()
+
+    @classmethod
+    def _clear_latest(cls):
+        cls.cls_latest_message = None
+        cls.cls_latest_frame = (None, 0)
+
+    def is_frame_intact(self, seq: int) -> bool:
+        """检查cls_latest_frame中序号为seq的消息在使用期间是否没有被覆盖
+
+        只有接收进程模式下的图像是共享内存视图，其他消息总是有效
+        """
+        if self.ingest_hub is None:
+            return True
+        return self.ingest_hub.is_frame_intact(self.topic_name, seq)
+
     def unsubscribe(self) -> bool:
         """取消订阅当前topic
         
         Returns:
             bool: 取消订阅是否成功
         """
+        if self.ingest_hub is not None and self.is_subscribed:
+            self._poll_stop_event.set()
+            self.ingest_hub.unsubscribe(self.topic_name)
+            self.ingest_hub = None
+            RosTopic._clear_latest()
+            self.is_subscribed = False
+            logging.info(f"取消订阅 {self.topic_name}")
+            return True
         if self.listener and self.is_subscribed:
             try:
                 self.listener.unsubscribe()
@@ -0,0 +1,199 @@
+"""
+ROS Topic订阅中心 - 多个topic的共享订阅
+同一个topic只订阅一次，使用引用计数管理，每个topic只保留最新一帧数据及其序号和接收时间
+单例模式实现
+
+设置环境变量 ROS_INGEST_MODE=process 时，订阅和图像解码在独立的接收进程中进行，
+图像topic的最新数据为共享内存中BGR图像的只读视图，见 ros.ingest_process；
+topic页面（RosTopic）的图像topic也通过这里订阅
+"""
+import os
+import time
+import threading
+import logging
+from typing import Optional, Dict, Any, Tuple
+
+import roslibpy
+
+from ros.ros_bridge import get_ros_bridge
+from ros.ingest_process import get_ingest_process
+
+
+INGEST_MODE = os.environ.get('ROS_INGEST_MODE', 'thread')
+
+
+class RosTopicHub:
+    """多topic共享订阅中心 - 单例模式"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """初始化订阅中心"""
+        # 确保只初始化一次
+        if not RosTopicHub._initialized:
+            self.ros_bridge = get_ros_bridge()
+            self._entries: Dict[str, Dict[str, Any]] = {}
+            self._lock = threading.Lock()
+            self.ingest = get_ingest_process() if INGEST_MODE == 'process' else None
+            RosTopicHub._initialized = True
+
+    def _make_handler(self, entry: Dict[str, Any]):
+        def handler(message):
+            # 整体替换元组，读取方总能拿到一致的(消息, 序号, 时间)
+            entry['latest'] = (message, entry['latest'][1] + 1, time.time())
+        return handler
+
+    def subscribe(self, topic_name: str, topic_type: str) -> bool:
+        """订阅topic，已订阅时只增加引用计数
+
+        Args:
+            topic_name: topic名称
+            topic_type: 消息类型
+
+        Returns:
+            bool: 订阅是否成功
+        """
+        if not self.ros_bridge.ros_is_connected:
+            logging.error(f"无法订阅 {topic_name}: ROS bridge未连接")
+            return False
+
+        if self.ingest is not None:
+            return self._subscribe_ingest(topic_name, topic_type)
+
+        with self._lock:
+            entry = self._entries.get(topic_name)
+            if entry is not None and entry['client'] is self.ros_bridge.ros_client:
+                entry['refcount'] += 1
+                return True
+
+            # 首次订阅，或重新连接后旧订阅失效
+            refcount = entry['refcount'] + 1 if entry is not None else 1
+            entry = {
+                'type': topic_type,
+                'client': self.ros_bridge.ros_client,
+                'refcount': refcount,
+                'latest': (None, 0, 0.0),
+                'listener': None,
+            }
+            try:
+                listener = roslibpy.Topic(self.ros_bridge.ros_client, topic_name, topic_type, queue_size=1)
+                listener.subscribe(self._make_handler(entry))
+                entry['listener'] = listener
+            except Exception as e:
+                logging.error(f"订阅 {topic_name} 失败: {e}")
+                return False
+            self._entries[topic_name] = entry
+            logging.info(f"成功订阅 {topic_name}")
+            return True
+
+    def _subscribe_ingest(self, topic_name: str, topic_type: str) -> bool:
+        """在接收进程中订阅，接收进程使用与RosBridge相同的地址"""
+        self.ingest.start()
+        self.ingest.set_endpoint(self.ros_bridge.ros_host, self.ros_bridge.ros_port)
+        # RosBridge切换设备后接收进程跟随重新连接
+        self.ingest.set_endpoint_source(lambda: (self.ros_bridge.ros_host, self.ros_bridge.ros_port))
+        with self._lock:
+            entry = self._entries.get(topic_name)
+            if entry is not None:
+                entry['refcount'] += 1
+                return True
+            self._entries[topic_name] = {
+                'type': topic_type,
+                'client': None,
+                'refcount': 1,
+                'latest': (None, 0, 0.0),
+                'listener': None,
+            }
+        self.ingest.subscribe(topic_name, topic_type)
+        logging.info(f"成功订阅 {topic_name} (接收进程)")
+        return True
+
+    def unsubscribe(self, topic_name: str):
+        """减少引用计数，归零时取消订阅
+
+        Args:
+            topic_name: topic名称
+        """
+        with self._lock:
+            entry = self._entries.get(topic_name)
+            if entry is None:
+                return
+            entry['refcount'] -= 1
+            if entry['refcount'] > 0:
+                return
+            del self._entries[topic_name]
+
+        if self.ingest is not None:
+            self.ingest.unsubscribe(topic_name)
+            logging.info(f"取消订阅 {topic_name}")
+            return
+
+        try:
+            if entry['listener'] is not None:
+                entry['listener'].unsubscribe()
+            logging.info(f"取消订阅 {topic_name}")
+        except Exception as e:
+            logging.error(f"取消订阅 {topic_name} 失败: {e}")
+
+    def get_latest(self, topic_name: str) -> Tuple[Optional[Dict[str, Any]], int, float]:
+        """获取topic的最新消息
+
+        Args:
+            topic_name: topic名称
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], int, float]: (消息, 序号, 接收时间)，没有数据时为(None, 0, 0.0)；
+                接收进程模式下图像topic的消息为BGR图像（np.ndarray）
+        """
+        entry = self._entries.get(topic_name)
+        if entry is None:
+            return None, 0, 0.0
+        if self.ingest is not None:
+            return self.ingest.get_latest(topic_name)
+        return entry['latest']
+
+    def is_frame_intact(self, topic_name: str, seq: int) -> bool:
+        """检查get_latest返回的消息在使用期间是否没有被覆盖
+
+        只有接收进程模式下的图像是共享内存视图，可能被覆盖；其他消息总是有效
+
+        Args:
+            topic_name: topic名称
+            seq: get_latest返回的序号
+
+        Returns:
+            bool: 消息仍然有效，返回False时应重新调用get_latest
+        """
+        if self.ingest is not None:
+            return self.ingest.is_frame_intact(topic_name, seq)
+        return True
+
+    def get_topic_type(self, topic_name: str) -> Optional[str]:
+        """获取已订阅topic的类型"""
+        entry = self._entries.get(topic_name)
+        return entry['type'] if entry is not None else None
+
+    def get_subscribed_topics(self) -> Dict[str, str]:
+        """获取所有已订阅的topic
+
+        Returns:
+            Dict[str, str]: {topic名称: 消息类型}
+        """
+        with self._lock:
+            return {name: entry['type'] for name, entry in self._entries.items()}
+
+
+def get_ros_topic_hub():
+    """获取订阅中心单例实例
+
+    Returns:
+        RosTopicHub: 订阅中心实例
+    """
+    ros_topic_hub = RosTopicHub()
+    return ros_topic_hub
@@ -0,0 +1,76 @@
+"""
+Topic索引 - 维护按名称排序的topic名称和类型
+topic列表变化时按差异增量更新，不重建整个索引；查询在浏览器端完成，见 ui_function.topic_picker
+"""
+import bisect
+import threading
+from typing import List, Dict, Tuple
+
+
+class TopicIndex:
+    """topic名称/类型索引"""
+
+    def __init__(self):
+        """初始化空索引"""
+        self.topics: Dict[str, str] = {}
+        self.version = 0
+        self._sorted_keys: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, name: str, topic_type: str):
+        self.topics[name] = topic_type
+        bisect.insort(self._sorted_keys, (name.lower(), name))
+
+    def _remove(self, name: str):
+        self.topics.pop(name)
+        key = (name.lower(), name)
+        position = bisect.bisect_left(self._sorted_keys, key)
+        if position < len(self._sorted_keys) and self._sorted_keys[position] == key:
+            del self._sorted_keys[position]
+
+    def update(self, topic_list: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], List[str]]:
+        """用最新的topic列表增量更新索引
+
+        Args:
+            topic_list: topic列表，每个元素包含name和type
+
+        Returns:
+            Tuple[List[Dict[str, str]], List[str]]: (新增或类型变化的topic, 已移除的topic名称)
+        """
+        latest = {topic['name']: topic['type'] for topic in topic_list}
+        with self._lock:
+            removed = [name for name in self.topics if name not in latest]
+            added = [{'name': name, 'type': topic_type} for name, topic_type in latest.items()
+                     if self.topics.get(name) != topic_type]
+
+            for name in removed:
+                self._remove(name)
+            for topic in added:
+                if topic['name'] in self.topics:
+                    self._remove(topic['name'])
+                self._add(topic['name'], topic['type'])
+
+            if added or removed:
+                self.version += 1
+        return added, removed
+
+    def snapshot(self) -> Tuple[List[Tuple[str, str]], int]:
+        """获取按名称排序的(名称, 类型)列表和对应的版本号
+
+        Returns:
+            Tuple[List[Tuple[str, str]], int]: (topic列表, 版本号)
+        """
+        with self._lock:
+            return [(name, self.topics[name]) for _, name in self._sorted_keys], self.version
+
+    def get_type(self, name: str) -> str:
+        """获取topic类型
+
+        Args:
+            name: topic名称
+
+        Returns:
+            str: topic类型，不存在时返回unknown
+        """
+        with self._lock:
+            return self.topics.get(name, 'unknown')
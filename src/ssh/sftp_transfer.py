@@ -0,0 +1,585 @@
+"""
+SFTP批量传输管理器 - 基于SSHManager已有连接的并行、可续传文件传输
+大文件按块切分，多个SFTP会话并行读写，每个会话内使用流水线请求；
+已完成的块记录在本地状态文件中，断线重连后从断点继续；
+日志类文本文件可以在远端gzip压缩后传输，本地边接收边解压
+单例模式实现
+"""
+import os
+import json
+import posixpath
+import queue
+import shlex
+import stat
+import threading
+import time
+import zlib
+import logging
+from typing import Optional, List, Dict, Any, Callable
+
+from ssh.ssh import get_ssh_manager
+
+
+# 每个块的大小，块是续传和并行调度的最小单位
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# 单个SFTP读写请求的大小（SFTP协议的常用上限）
+REQUEST_SIZE = 32768
+# SFTP通道的流控窗口，窗口越大高延迟链路上的吞吐越高
+DEFAULT_WINDOW_SIZE = 16 * 1024 * 1024
+
+
+class TransferTask:
+    """单个文件传输任务，记录进度和吞吐"""
+
+    def __init__(self, task_id: int, direction: str, remote_path: str, local_path: str,
+                 compressed: bool = False):
+        """初始化传输任务
+
+        Args:
+            task_id: 任务编号
+            direction: 传输方向（download/upload）
+            remote_path: 设备端路径
+            local_path: 本地路径
+            compressed: 是否在远端压缩后传输（仅下载）
+        """
+        self.task_id = task_id
+        self.direction = direction
+        self.remote_path = remote_path
+        self.local_path = local_path
+        self.compressed = compressed
+        self.total = 0
+        self.transferred = 0
+        self.status = 'pending'
+        self.error = ''
+        self.start_time = None
+        self.end_time = None
+        self.rate = 0.0
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._rate_sample = (time.time(), 0)
+
+    def reset_progress(self, total: int, transferred: int):
+        """开始（或续传）时重置进度
+
+        Args:
+            total: 总字节数
+            transferred: 已完成的字节数
+        """
+        with self._lock:
+            self.total = total
+            self.transferred = transferred
+            self.rate = 0.0
+            self._rate_sample = (time.time(), transferred)
+
+    def add_progress(self, num_bytes: int):
+        """累加已传输字节数并更新平滑后的吞吐
+
+        Args:
+            num_bytes: 新传输的字节数
+        """
+        with self._lock:
+            self.transferred += num_bytes
+            now = time.time()
+            last_time, last_bytes = self._rate_sample
+            elapsed = now - last_time
+            if elapsed >= 0.5:
+                instant = (self.transferred - last_bytes) / elapsed
+                self.rate = instant if self.rate == 0 else 0.7 * self.rate + 0.3 * instant
+                self._rate_sample = (now, self.transferred)
+
+    @property
+    def progress(self) -> float:
+        """传输进度（0~1）"""
+        return self.transferred / self.total if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为便于UI显示的字典"""
+        return {
+            'id': self.task_id,
+            'direction': self.direction,
+            'name': posixpath.basename(self.remote_path),
+            'remote_path': self.remote_path,
+            'local_path': self.local_path,
+            'total': self.total,
+            'transferred': self.transferred,
+            'progress': self.progress,
+            'rate': self.rate if self.status == 'running' else 0.0,
+            'status': self.status,
+            'error': self.error,
+        }
+
+
+def _load_chunk_state(state_path: str, size: int, mtime: int, chunk_size: int) -> set:
+    """读取续传状态，源文件发生变化时丢弃
+
+    Returns:
+        set: 已完成的块编号
+    """
+    try:
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+        if state.get('size') == size and state.get('mtime') == mtime and state.get('chunk_size') == chunk_size:
+            return set(state.get('done', []))
+    except (OSError, ValueError):
+        pass
+    return set()
+
+
+def _save_chunk_state(state_path: str, size: int, mtime: int, chunk_size: int, done: set):
+    """原子地写入续传状态"""
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'size': size, 'mtime': mtime, 'chunk_size': chunk_size, 'done': sorted(done)}, f)
+    os.replace(tmp_path, state_path)
+
+
+def _split_requests(offset: int, length: int) -> List[tuple]:
+    """将一个块拆分为SFTP请求大小的(偏移, 长度)列表"""
+    end = offset + length
+    return [(pos, min(REQUEST_SIZE, end - pos)) for pos in range(offset, end, REQUEST_SIZE)]
+
+
+class SftpTransferManager:
+    """SFTP批量传输管理器 - 单例模式"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, parallel: int = 4, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_retries: int = 3, retry_delay: float = 5.0, listing_ttl: float = 10.0):
+        """初始化传输管理器
+
+        Args:
+            parallel: 每个任务并行的SFTP会话数
+            chunk_size: 块大小（字节）
+            max_retries: 链路断开后自动续传的次数
+            retry_delay: 自动续传前的等待时间（秒）
+            listing_ttl: 远端目录列表缓存的有效期（秒）
+        """
+        # 确保只初始化一次
+        if not SftpTransferManager._initialized:
+            self.parallel = parallel
+            self.chunk_size = chunk_size
+            self.max_retries = max_retries
+            self.retry_delay = retry_delay
+            self.listing_ttl = listing_ttl
+            self.ssh_manager = get_ssh_manager()
+            self.tasks: Dict[int, TransferTask] = {}
+            self._next_task_id = 1
+            self._lock = threading.Lock()
+            self._listing_cache: Dict[str, tuple] = {}
+            self._browse_sftp = None
+            self._browse_lock = threading.Lock()
+            SftpTransferManager._initialized = True
+
+    # ---------------------------------------------------------------- 目录浏览
+
+    def _get_browse_sftp(self):
+        """获取用于目录浏览的SFTP会话，连接变化后自动重建"""
+        sftp = self._browse_sftp
+        if sftp is not None:
+            channel = sftp.get_channel()
+            if channel is None or channel.closed:
+                sftp = None
+        if sftp is None:
+            sftp = self.ssh_manager.open_sftp()
+            if sftp is None:
+                raise ConnectionError("无法打开SFTP会话")
+            self._browse_sftp = sftp
+        return sftp
+
+    def list_dir(self, path: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """列出远端目录，结果在有效期内缓存
+
+        Args:
+            path: 远端目录路径
+            refresh: 是否忽略缓存强制刷新
+
+        Returns:
+            List[Dict[str, Any]]: 目录项列表，目录在前，每项包含name/path/is_dir/size/mtime
+        """
+        cached = self._listing_cache.get(path)
+        if cached and not refresh and time.time() - cached[0] < self.listing_ttl:
+            return cached[1]
+
+        with self._browse_lock:
+            sftp = self._get_browse_sftp()
+            attrs = sftp.listdir_attr(path)
+
+        entries = [{
+            'name': attr.filename,
+            'path': posixpath.join(path, attr.filename),
+            'is_dir': stat.S_ISDIR(attr.st_mode or 0),
+            'size': attr.st_size or 0,
+            'mtime': attr.st_mtime or 0,
+        } for attr in attrs]
+        entries.sort(key=lambda e: (not e['is_dir'], e['name']))
+
+        self._listing_cache[path] = (time.time(), entries)
+        return entries
+
+    def invalidate_listing(self, path: str = None):
+        """使目录列表缓存失效
+
+        Args:
+            path: 远端目录路径，None表示清空全部缓存
+        """
+        if path is None:
+            self._listing_cache.clear()
+        else:
+            self._listing_cache.pop(path, None)
+
+    # ---------------------------------------------------------------- 任务管理
+
+    def _create_task(self, direction: str, remote_path: str, local_path: str,
+                     compressed: bool = False) -> TransferTask:
+        with self._lock:
+            task = TransferTask(self._next_task_id, direction, remote_path, local_path, compressed)
+            self.tasks[task.task_id] = task
+            self._next_task_id += 1
+        return task
+
+    def _start_task(self, task: TransferTask):
+        task.cancel_event.clear()
+        task.status = 'pending'
+        task.error = ''
+        thread = threading.Thread(target=self._run_task, args=(task,),
+                                  name=f'sftp-transfer-{task.task_id}', daemon=True)
+        thread.start()
+
+    def download(self, remote_path: str, local_path: str, compressed: bool = False) -> TransferTask:
+        """后台下载文件
+
+        Args:
+            remote_path: 设备端文件路径
+            local_path: 本地保存路径
+            compressed: 是否在远端用gzip压缩后传输（适合日志等文本文件，不支持断点续传）
+
+        Returns:
+            TransferTask: 传输任务
+        """
+        task = self._create_task('download', remote_path, local_path, compressed)
+        self._start_task(task)
+        return task
+
+    def upload(self, local_path: str, remote_path: str) -> TransferTask:
+        """后台上传文件
+
+        Args:
+            local_path: 本地文件路径
+            remote_path: 设备端保存路径
+
+        Returns:
+            TransferTask: 传输任务
+        """
+        task = self._create_task('upload', remote_path, local_path)
+        self._start_task(task)
+        return task
+
+    def resume(self, task_id: int) -> bool:
+        """从断点继续一个失败或已取消的任务
+
+        Args:
+            task_id: 任务编号
+
+        Returns:
+            bool: 是否已重新启动
+        """
+        task = self.tasks.get(task_id)
+        if task is None or task.status not in ('failed', 'cancelled'):
+            return False
+        # 链路断开后SSHManager仍保留旧会话，续传前先重新建立连接
+        if not self.ssh_manager.ensure_connected():
+            task.error = 'SSH未连接'
+            return False
+        self._start_task(task)
+        return True
+
+    def cancel(self, task_id: int) -> bool:
+        """取消任务，已完成的块保留用于续传
+
+        Args:
+            task_id: 任务编号
+
+        Returns:
+            bool: 是否找到该任务
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        task.cancel_event.set()
+        return True
+
+    def get_tasks(self) -> List[Dict[str, Any]]:
+        """获取所有任务的状态
+
+        Returns:
+            List[Dict[str, Any]]: 任务状态列表
+        """
+        return [task.to_dict() for task in list(self.tasks.values())]
+
+    def _run_task(self, task: TransferTask):
+        """后台线程：执行任务，链路断开时等待后自动续传"""
+        task.status = 'running'
+        task.start_time = time.time()
+        attempt = 0
+        while True:
+            try:
+                if task.direction == 'upload':
+                    self._upload_file(task)
+                    self.invalidate_listing(posixpath.dirname(task.remote_path))
+                elif task.compressed:
+                    self._download_compressed(task)
+                else:
+                    self._download_file(task)
+
+                task.status = 'cancelled' if task.cancel_event.is_set() else 'done'
+                break
+            except Exception as e:
+                attempt += 1
+                task.error = str(e)
+                if task.cancel_event.is_set() or task.compressed or attempt > self.max_retries:
+                    logging.error(f"传输失败 {task.remote_path}: {e}")
+                    task.status = 'cancelled' if task.cancel_event.is_set() else 'failed'
+                    break
+                logging.warning(f"传输中断 {task.remote_path}: {e}，{self.retry_delay}秒后续传")
+                if task.cancel_event.wait(self.retry_delay):
+                    task.status = 'cancelled'
+                    break
+                if not self.ssh_manager.ensure_connected():
+                    logging.warning(f"SSH重新连接失败，{self.retry_delay}秒后重试")
+        task.end_time = time.time()
+
+    def _run_chunk_workers(self, task: TransferTask, chunks: List[tuple],
+                           worker: Callable[[object, queue.Queue], None]):
+        """并行运行块传输工作线程，每个线程使用独立的SFTP会话
+
+        Args:
+            task: 传输任务
+            chunks: 待传输的(块编号, 偏移, 长度)列表
+            worker: 工作函数，参数为(sftp, 块队列)
+        """
+        chunk_queue = queue.Queue()
+        for chunk in chunks:
+            chunk_queue.put(chunk)
+
+        errors = []
+
+        def run():
+            sftp = self.ssh_manager.open_sftp(window_size=DEFAULT_WINDOW_SIZE)
+            if sftp is None:
+                errors.append(ConnectionError("无法打开SFTP会话"))
+                return
+            try:
+                worker(sftp, chunk_queue)
+            except Exception as e:
+                errors.append(e)
+                # 出错后让其他线程尽快结束，未完成的块留给续传
+                task.cancel_event.set()
+            finally:
+                sftp.close()
+
+        threads = [threading.Thread(target=run, daemon=True)
+                   for _ in range(min(self.parallel, len(chunks)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            task.cancel_event.clear()
+            raise errors[0]
+
+    def _download_file(self, task: TransferTask):
+        """分块并行下载，块完成后记录状态以便续传"""
+        sftp = self.ssh_manager.open_sftp()
+        if sftp is None:
+            raise ConnectionError("无法打开SFTP会话")
+        try:
+            attr = sftp.stat(task.remote_path)
+        finally:
+            sftp.close()
+
+        size, mtime = attr.st_size or 0, int(attr.st_mtime or 0)
+        part_path = task.local_path + '.part'
+        state_path = task.local_path + '.part.json'
+
+        done = set()
+        if os.path.exists(part_path):
+            done = _load_chunk_state(state_path, size, mtime, self.chunk_size)
+
+        chunks = [(index, offset, min(self.chunk_size, size - offset))
+                  for index, offset in enumerate(range(0, size, self.chunk_size))]
+        pending = [chunk for chunk in chunks if chunk[0] not in done]
+        task.reset_progress(size, sum(chunk[2] for chunk in chunks if chunk[0] in done))
+
+        # 预分配本地文件，各线程按偏移写入
+        local_dir = os.path.dirname(os.path.abspath(task.local_path))
+        os.makedirs(local_dir, exist_ok=True)
+        with open(part_path, 'r+b' if os.path.exists(part_path) else 'wb') as f:
+            f.truncate(size)
+
+        state_lock = threading.Lock()
+
+        def mark_done(index: int):
+            with state_lock:
+                done.add(index)
+                _save_chunk_state(state_path, size, mtime, self.chunk_size, done)
+
+        def worker(worker_sftp, chunk_queue: queue.Queue):
+            with worker_sftp.open(task.remote_path, 'rb') as remote_file, open(part_path, 'r+b') as local_file:
+                while not task.cancel_event.is_set():
+                    try:
+                        index, offset, length = chunk_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    # readv一次性发出该块的所有请求，流水线接收
+                    local_file.seek(offset)
+                    for data in remote_file.readv(_split_requests(offset, length)):
+                        local_file.write(data)
+                        task.add_progress(len(data))
+                    local_file.flush()
+                    mark_done(index)
+
+        if pending:
+            self._run_chunk_workers(task, pending, worker)
+
+        if len(done) == len(chunks) and not task.cancel_event.is_set():
+            os.replace(part_path, task.local_path)
+            if os.path.exists(state_path):
+                os.remove(state_path)
+
+    def _upload_file(self, task: TransferTask):
+        """分块并行上传到远端临时文件，全部完成后重命名"""
+        local_stat = os.stat(task.local_path)
+        size, mtime = local_stat.st_size, int(local_stat.st_mtime)
+        part_path = task.remote_path + '.part'
+        state_path = task.local_path + '.upload.json'
+
+        sftp = self.ssh_manager.open_sftp()
+        if sftp is None:
+            raise ConnectionError("无法打开SFTP会话")
+        try:
+            done = set()
+            try:
+                sftp.stat(part_path)
+                done = _load_chunk_state(state_path, size, mtime, self.chunk_size)
+            except IOError:
+                pass
+            if not done:
+                sftp.open(part_path, 'wb').close()
+        finally:
+            sftp.close()
+
+        chunks = [(index, offset, min(self.chunk_size, size - offset))
+                  for index, offset in enumerate(range(0, size, self.chunk_size))]
+        pending = [chunk for chunk in chunks if chunk[0] not in done]
+        task.reset_progress(size, sum(chunk[2] for chunk in chunks if chunk[0] in done))
+
+        state_lock = threading.Lock()
+
+        def mark_done(index: int):
+            with state_lock:
+                done.add(index)
+                _save_chunk_state(state_path, size, mtime, self.chunk_size, done)
+
+        def worker(worker_sftp, chunk_queue: queue.Queue):
+            with worker_sftp.open(part_path, 'r+b') as remote_file, open(task.local_path, 'rb') as local_file:
+                # 流水线写入，不逐个等待服务端确认
+                remote_file.set_pipelined(True)
+                while not task.cancel_event.is_set():
+                    try:
+                        index, offset, length = chunk_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    remote_file.seek(offset)
+                    local_file.seek(offset)
+                    remaining = length
+                    while remaining > 0:
+                        data = local_file.read(min(REQUEST_SIZE, remaining))
+                        if not data:
+                            break
+                        remote_file.write(data)
+                        remaining -= len(data)
+                        task.add_progress(len(data))
+                    # 同步请求会先处理完之前所有写请求的确认，确认后才记录该块完成
+                    remote_file.flush()
+                    remote_file.stat()
+                    mark_done(index)
+
+        if pending:
+            self._run_chunk_workers(task, pending, worker)
+
+        if len(done) == len(chunks) and not task.cancel_event.is_set():
+            sftp = self.ssh_manager.open_sftp()
+            if sftp is None:
+                raise ConnectionError("无法打开SFTP会话")
+            try:
+                try:
+                    sftp.posix_rename(part_path, task.remote_path)
+                except IOError:
+                    # 服务端不支持posix-rename扩展时退回普通重命名
+                    try:
+                        sftp.remove(task.remote_path)
+                    except IOError:
+                        pass
+                    sftp.rename(part_path, task.remote_path)
+            finally:
+                sftp.close()
+            if os.path.exists(state_path):
+                os.remove(state_path)
+
+    def _download_compressed(self, task: TransferTask, level: int = 1):
+        """远端gzip压缩后流式下载，本地边接收边解压"""
+        sftp = self.ssh_manager.open_sftp()
+        if sftp is None:
+            raise ConnectionError("无法打开SFTP会话")
+        try:
+            size = sftp.stat(task.remote_path).st_size or 0
+        finally:
+            sftp.close()
+        task.reset_progress(size, 0)
+
+        channel = self.ssh_manager.open_command_channel(f"gzip -c -{level} {shlex.quote(task.remote_path)}")
+        if channel is None:
+            raise ConnectionError("无法打开SSH通道")
+
+        part_path = task.local_path + '.part'
+        os.makedirs(os.path.dirname(os.path.abspath(task.local_path)), exist_ok=True)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            with open(part_path, 'wb') as f:
+                while not task.cancel_event.is_set():
+                    data = channel.recv(REQUEST_SIZE * 4)
+                    if not data:
+                        break
+                    output = decompressor.decompress(data)
+                    f.write(output)
+                    task.add_progress(len(output))
+                f.write(decompressor.flush())
+
+            if task.cancel_event.is_set():
+                return
+            exit_status = channel.recv_exit_status()
+            if exit_status != 0:
+                error = channel.recv_stderr(4096).decode('utf-8', errors='ignore')
+                raise RuntimeError(f"gzip退出码 {exit_status}: {error.strip()}")
+        finally:
+            channel.close()
+
+        os.replace(part_path, task.local_path)
+
+
+def get_sftp_transfer_manager():
+    """获取SFTP传输管理器单例实例
+
+    Returns:
+        SftpTransferManager: 传输管理器实例
+    """
+    sftp_transfer_manager = SftpTransferManager()
+    return sftp_transfer_manager
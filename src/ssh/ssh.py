@@ -4,7 +4,7 @@ SSH连接管理器 - 简化的SSH连接和执行命令功能
 """
 import paramiko
 import logging
-from typing import Tuple
+from typing import Tuple, Optional
 
 
 class SSHManager:
@@ -33,6 +33,10 @@ class SSHManager:
             self.port = port
             self.ssh_client = None
             self.is_connected = False
+            # 最近一次连接使用的密码，链路断开后重新建立会话时使用
+            self._password = None
+            # 是否成功连接过，重连失败后仍可继续尝试
+            self._established = False
             SSHManager._initialized = True
     
     def update_parameters(self, hostname: str = None, username: str = None, port: int = None) -> bool:
@@ -61,6 +65,26 @@ class SSHManager:
             need_reconnect = True
         
         return need_reconnect
+
+    def is_transport_active(self) -> bool:
+        """检查SSH传输层是否仍然可用，链路断开后is_connected不会自动更新"""
+        if not self.is_connected or not self.ssh_client:
+            return False
+        transport = self.ssh_client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def ensure_connected(self) -> bool:
+        """确保连接可用，链路断开时使用上次的参数重新建立会话
+
+        Returns:
+            bool: 连接是否可用；从未连接过时返回False
+        """
+        if self.is_transport_active():
+            return True
+        if not self._established:
+            return False
+        logging.warning(f"SSH链路已断开，重新连接: {self.username}@{self.hostname}:{self.port}")
+        return self.connect()
     
     def connect(self, hostname: str = None, username: str = None, 
                 password: str = None, port: int = None) -> bool:
@@ -78,9 +102,11 @@ class SSHManager:
         try:
             # 更新参数并检查是否需要重新连接
             need_reconnect = self.update_parameters(hostname, username, port)
+            if password is not None:
+                self._password = password
             
-            # 如果客户端不存在或者需要重新连接，创建新的连接
-            if self.ssh_client is None or need_reconnect:
+            # 如果客户端不存在、需要重新连接或者链路已断开，创建新的连接
+            if self.ssh_client is None or need_reconnect or not self.is_transport_active():
                 if self.ssh_client is not None:
                     self.disconnect()
                 
@@ -96,12 +122,13 @@ class SSHManager:
                     'timeout': 10
                 }
                 
-                if password:
-                    connect_kwargs['password'] = password
+                if self._password:
+                    connect_kwargs['password'] = self._password
                 
                 # 建立连接
                 self.ssh_client.connect(**connect_kwargs)
                 self.is_connected = True
+                self._established = True
                 
                 logging.info(f"成功连接到SSH服务器: {self.username}@{self.hostname}:{self.port}")
                 return True
@@ -155,7 +182,64 @@ class SSHManager:
             error_msg = f"执行命令失败: {e}"
             logging.error(error_msg)
             return False, "", error_msg
-    
+
+    def open_command_channel(self, command: str) -> Optional[paramiko.Channel]:
+        """在现有连接上打开一个长连接会话通道并执行命令
+
+        与execute_command不同，该方法不会等待命令结束，调用方自行增量读取输出，
+        适用于常驻远端的采集脚本等长时间运行的命令
+
+        Args:
+            command: 要执行的命令
+
+        Returns:
+            Optional[paramiko.Channel]: 会话通道，失败时返回None
+        """
+        if not self.is_connected or not self.ssh_client:
+            logging.warning("未连接到SSH服务器，无法打开通道")
+            return None
+
+        try:
+            transport = self.ssh_client.get_transport()
+            if transport is None or not transport.is_active():
+                logging.error("SSH传输层不可用")
+                return None
+
+            channel = transport.open_session()
+            channel.exec_command(command)
+            return channel
+
+        except Exception as e:
+            logging.error(f"打开SSH通道失败: {e}")
+            return None
+
+    def open_sftp(self, window_size: int = None) -> Optional[paramiko.SFTPClient]:
+        """在现有连接上打开一个新的SFTP会话
+
+        每个SFTP会话占用独立的通道和流控窗口，多个会话可以并行传输
+
+        Args:
+            window_size: SFTP通道的流控窗口大小（字节），None表示使用paramiko默认值
+
+        Returns:
+            Optional[paramiko.SFTPClient]: SFTP客户端，失败时返回None
+        """
+        if not self.is_connected or not self.ssh_client:
+            logging.warning("未连接到SSH服务器，无法打开SFTP")
+            return None
+
+        try:
+            transport = self.ssh_client.get_transport()
+            if transport is None or not transport.is_active():
+                logging.error("SSH传输层不可用")
+                return None
+
+            return paramiko.SFTPClient.from_transport(transport, window_size=window_size)
+
+        except Exception as e:
+            logging.error(f"打开SFTP会话失败: {e}")
+            return None
+
     def __del__(self):
         """析构函数，确保断开连接"""
         self.disconnect()
@@ -0,0 +1,150 @@
+from nicegui import ui
+from ssh.sftp_transfer import get_sftp_transfer_manager
+
+import os
+import posixpath
+import logging
+import asyncio
+
+sftp_transfer_manager = get_sftp_transfer_manager()
+
+# 默认的本地下载目录（相对于项目根目录）
+DEFAULT_DOWNLOAD_DIR = 'downloads'
+
+
+def format_size(num_bytes) -> str:
+    """将字节数格式化为易读的字符串"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+@ui.page('/file_page')
+def file_page():
+    ui.page_title('Qualcomm Robotics SDK Tools')
+
+    # 标题栏区域
+    with ui.header(elevated=True).style('background-color: #4f6db9'):
+        ui.link('Qualcomm Robotics SDK', '/').classes('text-red-500')
+        ui.link('Topic', '/topic_page').classes('text-red-500')
+        ui.link('Mosaic', '/mosaic_page').classes('text-red-500')
+        ui.link('Graph', '/graph_page').classes('text-red-500')
+        ui.link('Teleop', '/teleop_page').classes('text-red-500')
+        ui.link('Files', '/file_page').classes('text-red-500')
+
+    with ui.column().classes('w-full p-4'):
+
+        ui.label('Files').classes('text-h5 font-bold mt-4')
+
+        # 远端目录浏览
+        with ui.card().classes('w-full mt-4'):
+            with ui.row().classes('w-full items-center'):
+                remote_dir_input = ui.input(label='Remote Directory', value='/').classes('w-96')
+                local_dir_input = ui.input(label='Local Directory', value=DEFAULT_DOWNLOAD_DIR).classes('w-64')
+                compress_checkbox = ui.checkbox('Compress (gzip, for logs)')
+
+            columns = [
+                {'name': 'name', 'label': 'Name', 'field': 'name', 'align': 'left'},
+                {'name': 'size', 'label': 'Size', 'field': 'size_text', 'align': 'right'},
+            ]
+            listing_table = ui.table(columns=columns, rows=[], row_key='path').classes('w-full')
+
+            async def load_directory(path: str, refresh: bool = False):
+                """异步加载远端目录（带缓存）"""
+                listing_table.props('loading')
+                try:
+                    loop = asyncio.get_event_loop()
+                    entries = await loop.run_in_executor(
+                        None,
+                        sftp_transfer_manager.list_dir, path, refresh
+                    )
+                    remote_dir_input.value = path
+                    rows = []
+                    if path != '/':
+                        rows.append({'name': '..', 'path': posixpath.dirname(path.rstrip('/')) or '/',
+                                     'is_dir': True, 'size_text': ''})
+                    for entry in entries:
+                        rows.append({
+                            'name': entry['name'] + ('/' if entry['is_dir'] else ''),
+                            'path': entry['path'],
+                            'is_dir': entry['is_dir'],
+                            'size_text': '' if entry['is_dir'] else format_size(entry['size']),
+                        })
+                    listing_table.rows = rows
+                    listing_table.update()
+                except Exception as e:
+                    logging.error(f"加载远端目录失败: {e}")
+                    ui.notify(f"加载远端目录失败: {e}", type='negative', position='top')
+                finally:
+                    listing_table.props(remove='loading')
+
+            def handle_row_click(e):
+                """目录进入，文件下载"""
+                row = e.args[1]
+                if row['is_dir']:
+                    asyncio.create_task(load_directory(row['path']))
+                    return
+
+                local_path = os.path.join(local_dir_input.value or DEFAULT_DOWNLOAD_DIR,
+                                          posixpath.basename(row['path']))
+                sftp_transfer_manager.download(row['path'], local_path, compressed=compress_checkbox.value)
+                ui.notify(f"开始下载 {row['path']}", position='top')
+
+            listing_table.on('rowClick', handle_row_click)
+
+            with ui.row().classes('items-center'):
+                ui.button('Open', on_click=lambda: load_directory(remote_dir_input.value or '/'))
+                ui.button('Refresh', on_click=lambda: load_directory(remote_dir_input.value or '/', refresh=True))
+
+            # 上传本地文件到当前远端目录
+            with ui.row().classes('w-full items-center'):
+                upload_path_input = ui.input(label='Local File to Upload').classes('w-96')
+
+                def handle_upload_click():
+                    """处理上传按钮点击"""
+                    local_path = upload_path_input.value
+                    if not local_path or not os.path.isfile(local_path):
+                        ui.notify('请输入有效的本地文件路径', type='negative', position='top')
+                        return
+                    remote_path = posixpath.join(remote_dir_input.value or '/', os.path.basename(local_path))
+                    sftp_transfer_manager.upload(local_path, remote_path)
+                    ui.notify(f"开始上传 {local_path}", position='top')
+
+                ui.button('Upload', on_click=handle_upload_click)
+
+        # 传输任务
+        with ui.card().classes('w-full mt-4'):
+            ui.label('Transfers').classes('text-h6 font-bold')
+
+            task_columns = [
+                {'name': 'id', 'label': '#', 'field': 'id'},
+                {'name': 'direction', 'label': 'Direction', 'field': 'direction'},
+                {'name': 'name', 'label': 'File', 'field': 'name', 'align': 'left'},
+                {'name': 'progress', 'label': 'Progress', 'field': 'progress_text'},
+                {'name': 'rate', 'label': 'Throughput', 'field': 'rate_text'},
+                {'name': 'status', 'label': 'Status', 'field': 'status'},
+            ]
+            task_table = ui.table(columns=task_columns, rows=[], row_key='id',
+                                  selection='single').classes('w-full')
+
+            def update_task_display():
+                """更新传输任务进度"""
+                rows = []
+                for task in sftp_transfer_manager.get_tasks():
+                    task['progress_text'] = (f"{task['progress'] * 100:.1f}% "
+                                             f"({format_size(task['transferred'])} / {format_size(task['total'])})")
+                    task['rate_text'] = f"{format_size(task['rate'])}/s" if task['rate'] else ''
+                    rows.append(task)
+                task_table.rows = rows
+                task_table.update()
+
+            def selected_task_id():
+                return task_table.selected[0]['id'] if task_table.selected else None
+
+            with ui.row():
+                ui.button('Cancel', on_click=lambda: sftp_transfer_manager.cancel(selected_task_id()))
+                ui.button('Resume', on_click=lambda: sftp_transfer_manager.resume(selected_task_id()))
+
+            ui.timer(0.5, update_task_display)
@@ -0,0 +1,112 @@
+from nicegui import ui
+from ros.ros_graph import get_ros_graph_browser
+
+import json
+import logging
+import asyncio
+
+ros_graph_browser = get_ros_graph_browser()
+
+
+@ui.page('/graph_page')
+def graph_page():
+    ui.page_title('Qualcomm Robotics SDK Tools')
+
+    # 标题栏区域
+    with ui.header(elevated=True).style('background-color: #4f6db9'):
+        ui.link('Qualcomm Robotics SDK', '/').classes('text-red-500')
+        ui.link('Topic', '/topic_page').classes('text-red-500')
+        ui.link('Mosaic', '/mosaic_page').classes('text-red-500')
+        ui.link('Graph', '/graph_page').classes('text-red-500')
+        ui.link('Teleop', '/teleop_page').classes('text-red-500')
+        ui.link('Files', '/file_page').classes('text-red-500')
+
+    with ui.column().classes('w-full p-4'):
+
+        ui.label('Services & Parameters').classes('text-h5 font-bold mt-4')
+
+        with ui.row().classes('w-full items-center'):
+            filter_input = ui.input(label='Filter').classes('w-64')
+            refresh_button = ui.button('Refresh')
+
+        with ui.row().classes('w-full no-wrap items-start'):
+            # service列表
+            with ui.card().classes('w-1/2'):
+                ui.label('Services').classes('text-h6 font-bold')
+                service_table = ui.table(columns=[
+                    {'name': 'name', 'label': 'Name', 'field': 'name', 'align': 'left', 'sortable': True},
+                    {'name': 'type', 'label': 'Type', 'field': 'type', 'align': 'left'},
+                ], rows=[], row_key='name', pagination=20).classes('w-full')
+                service_table.bind_filter_from(filter_input, 'value')
+
+            # 参数列表
+            with ui.card().classes('w-1/2'):
+                ui.label('Parameters').classes('text-h6 font-bold')
+                param_table = ui.table(columns=[
+                    {'name': 'node', 'label': 'Node', 'field': 'node', 'align': 'left', 'sortable': True},
+                    {'name': 'param', 'label': 'Parameter', 'field': 'param', 'align': 'left'},
+                    {'name': 'value', 'label': 'Value', 'field': 'value', 'align': 'left'},
+                ], rows=[], row_key='key', selection='single', pagination=20).classes('w-full')
+                param_table.bind_filter_from(filter_input, 'value')
+
+                with ui.row().classes('w-full items-center'):
+                    value_input = ui.input(label='New Value (JSON)').classes('w-64')
+
+                    async def handle_set_click():
+                        """处理设置参数按钮点击"""
+                        if not param_table.selected:
+                            ui.notify('请先选择一个参数', type='warning', position='top')
+                            return
+                        row = param_table.selected[0]
+                        try:
+                            value = json.loads(value_input.value)
+                        except ValueError:
+                            value = value_input.value
+
+                        loop = asyncio.get_event_loop()
+                        success = await loop.run_in_executor(
+                            None,
+                            ros_graph_browser.set_param, row['node'], row['param'], value
+                        )
+                        if success:
+                            ui.notify(f"已设置 {row['node']}:{row['param']}", type='positive', position='top')
+                            await refresh_graph(refresh=False)
+                        else:
+                            ui.notify(f"设置 {row['node']}:{row['param']} 失败", type='negative', position='top')
+
+                    ui.button('Set', on_click=handle_set_click)
+
+    async def refresh_graph(refresh: bool = True):
+        """并发获取service和参数，避免阻塞UI"""
+        refresh_button.props('loading')
+        try:
+            loop = asyncio.get_event_loop()
+            services, parameters = await asyncio.gather(
+                loop.run_in_executor(None, ros_graph_browser.get_services, refresh),
+                loop.run_in_executor(None, ros_graph_browser.get_parameters, refresh),
+            )
+
+            service_table.rows = services
+            service_table.update()
+
+            param_table.rows = [{
+                'key': f"{node}:{param}",
+                'node': node,
+                'param': param,
+                'value': json.dumps(value),
+            } for node, params in sorted(parameters.items()) for param, value in sorted(params.items())]
+            param_table.update()
+
+            errors = ros_graph_browser.last_errors
+            if errors['services'] or errors['params']:
+                ui.notify(f"{len(errors['services'])} 个service类型和 {len(errors['params'])} 个参数获取失败",
+                          type='warning', position='top')
+
+        except Exception as e:
+            logging.error(f"刷新service和参数失败: {e}")
+            ui.notify(f"获取service和参数失败: {e}", type='negative', position='top')
+        finally:
+            refresh_button.props(remove='loading')
+
+    refresh_button.on_click(lambda: refresh_graph(refresh=True))
+    ui.timer(0.1, lambda: refresh_graph(refresh=False), once=True)
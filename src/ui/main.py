@@ -20,6 +20,11 @@ sys.path.insert(0, os.path.join(project_root, 'src'))
 
 from nicegui import ui
 from ui.topic_page import topic_page
+from ui.file_page import file_page
+from ui.graph_page import graph_page
+from ui.teleop_page import teleop_page
+from ui.mosaic_page import mosaic_page
+from api import headless_api
 from ui_function.connect_device_controller import ConnectDeviceController
 
 device_controller = ConnectDeviceController()
@@ -31,6 +36,10 @@ def page():
     with ui.header(elevated=True).style('background-color: #4f6db9'):
         ui.link('Qualcomm Robotics SDK', '/').classes('text-red-500')
         ui.link('Topic', '/topic_page').classes('text-red-500')
+        ui.link('Mosaic', '/mosaic_page').classes('text-red-500')
+        ui.link('Graph', '/graph_page').classes('text-red-500')
+        ui.link('Teleop', '/teleop_page').classes('text-red-500')
+        ui.link('Files', '/file_page').classes('text-red-500')
     
     #占位
     ui.label()
@@ -76,7 +85,7 @@ def page():
                 
                 # 检查SSH是否已经连接到相同的IP和端口
                 ssh_already_connected = (
-                    ssh_manager.is_connected and
+                    ssh_manager.is_transport_active() and
                     ssh_manager.hostname == ip and
                     ssh_manager.port == ssh_port_val and
                     ssh_manager.username == username_val
@@ -0,0 +1,107 @@
+from nicegui import ui
+from ros.ros_bridge import get_ros_bridge
+from ui_function.mosaic import MosaicCompositor, MOSAIC_LAYOUTS, MOSAIC_RESOLUTIONS
+
+import logging
+import asyncio
+
+ros_bridge_instance = get_ros_bridge()
+
+IMAGE_TOPIC_TYPES = ('sensor_msgs/msg/Image', 'sensor_msgs/Image')
+
+
+@ui.page('/mosaic_page')
+def mosaic_page():
+    ui.page_title('Qualcomm Robotics SDK Tools')
+
+    # 标题栏区域
+    with ui.header(elevated=True).style('background-color: #4f6db9'):
+        ui.link('Qualcomm Robotics SDK', '/').classes('text-red-500')
+        ui.link('Topic', '/topic_page').classes('text-red-500')
+        ui.link('Mosaic', '/mosaic_page').classes('text-red-500')
+        ui.link('Graph', '/graph_page').classes('text-red-500')
+        ui.link('Teleop', '/teleop_page').classes('text-red-500')
+        ui.link('Files', '/file_page').classes('text-red-500')
+
+    # 每个页面独立的合成器
+    state = {'compositor': None, 'busy': False, 'types': {}}
+
+    with ui.column().classes('w-full p-4'):
+
+        ui.label('Camera Mosaic').classes('text-h5 font-bold mt-4')
+
+        with ui.row().classes('w-full items-center'):
+            topic_select = ui.select(options={}, label='Image Topics', multiple=True,
+                                     with_input=True).props('use-chips').classes('w-96')
+            layout_select = ui.select(options=list(MOSAIC_LAYOUTS), value='auto', label='Layout').classes('w-32')
+            resolution_select = ui.select(options=list(MOSAIC_RESOLUTIONS), value='1280x720',
+                                          label='Resolution').classes('w-32')
+            fps_input = ui.number(label='FPS', value=10, min=1, max=30).classes('w-20')
+            start_button = ui.button('Start')
+            ui.button('Stop', on_click=lambda: stop_mosaic())
+
+        with ui.card().classes('w-full mt-4'):
+            ui.html('<img id="mosaic_frame" style="width:100%; height:auto; background: #000; border-radius: 8px; object-fit: contain;" />', sanitize=False)
+
+    async def load_image_topics():
+        """获取所有图像topic"""
+        loop = asyncio.get_event_loop()
+        topic_list = await loop.run_in_executor(None, ros_bridge_instance.get_available_topics)
+        topic_select.set_options({topic['name']: topic['name'] for topic in topic_list
+                                  if topic['type'] in IMAGE_TOPIC_TYPES})
+        state['types'] = {topic['name']: topic['type'] for topic in topic_list}
+
+    def release_compositor():
+        """取消合成器的订阅"""
+        if state['compositor'] is not None:
+            state['compositor'].stop()
+            state['compositor'] = None
+
+    def stop_mosaic():
+        """停止拼接并取消订阅"""
+        mosaic_timer.deactivate()
+        release_compositor()
+
+    def start_mosaic():
+        """按当前选择创建合成器并开始推送"""
+        stop_mosaic()
+        topics = [(name, state['types'].get(name, 'sensor_msgs/msg/Image'))
+                  for name in (topic_select.value or [])]
+        if not topics:
+            ui.notify('请至少选择一个图像topic', type='warning', position='top')
+            return
+
+        compositor = MosaicCompositor(topics, layout=layout_select.value,
+                                      resolution=MOSAIC_RESOLUTIONS[resolution_select.value])
+        if not compositor.start():
+            ui.notify('部分topic订阅失败', type='negative', position='top')
+        state['compositor'] = compositor
+        mosaic_timer.interval = 1.0 / (fps_input.value or 10)
+        mosaic_timer.activate()
+
+    async def push_mosaic_frame():
+        """合成并推送一帧，上一帧未完成时跳过"""
+        compositor = state['compositor']
+        if compositor is None or state['busy']:
+            return
+        state['busy'] = True
+        try:
+            # 解码、缩放和编码在后台线程中执行，避免阻塞UI
+            loop = asyncio.get_event_loop()
+            img_base64 = await loop.run_in_executor(None, compositor.compose_jpeg_base64)
+            if img_base64:
+                ui.run_javascript(f'''
+                    const img = document.getElementById("mosaic_frame");
+                    if (img) {{
+                        img.src = "data:image/jpeg;base64,{img_base64}";
+                    }}
+                ''')
+        except Exception as e:
+            logging.error(f"合成拼接图像失败: {e}")
+        finally:
+            state['busy'] = False
+
+    start_button.on_click(start_mosaic)
+    mosaic_timer = ui.timer(0.1, push_mosaic_frame, active=False)
+    ui.timer(0.1, load_image_topics, once=True)
+    ui.context.client.on_disconnect(release_compositor)
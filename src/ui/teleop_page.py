@@ -0,0 +1,107 @@
+from nicegui import ui
+from ros.ros_publisher import get_teleop_controller, send_goal
+
+import math
+
+teleop_controller = get_teleop_controller()
+
+
+@ui.page('/teleop_page')
+def teleop_page():
+    ui.page_title('Qualcomm Robotics SDK Tools')
+
+    # 标题栏区域
+    with ui.header(elevated=True).style('background-color: #4f6db9'):
+        ui.link('Qualcomm Robotics SDK', '/').classes('text-red-500')
+        ui.link('Topic', '/topic_page').classes('text-red-500')
+        ui.link('Mosaic', '/mosaic_page').classes('text-red-500')
+        ui.link('Graph', '/graph_page').classes('text-red-500')
+        ui.link('Teleop', '/teleop_page').classes('text-red-500')
+        ui.link('Files', '/file_page').classes('text-red-500')
+
+    with ui.column().classes('w-full p-4'):
+
+        ui.label('Teleop').classes('text-h5 font-bold mt-4')
+
+        with ui.row().classes('w-full items-start'):
+            # 速度遥控
+            with ui.card():
+                ui.label('Velocity').classes('text-h6 font-bold')
+                topic_input = ui.input(label='Topic', value=teleop_controller.topic_name).classes('w-64')
+                max_linear = ui.number(label='Max Linear (m/s)', value=0.5, step=0.1).classes('w-64')
+                max_angular = ui.number(label='Max Angular (rad/s)', value=1.0, step=0.1).classes('w-64')
+
+                def handle_enable_change(e):
+                    """启用或停止遥控"""
+                    if e.value:
+                        teleop_controller.topic_name = topic_input.value or '/cmd_vel'
+                        teleop_controller.start()
+                    else:
+                        teleop_controller.stop()
+
+                enable_switch = ui.switch('Enable', on_change=handle_enable_change)
+
+                def handle_joystick_move(e):
+                    """摇杆输入只更新最新指令，由发布线程按固定频率发送"""
+                    if not enable_switch.value:
+                        return
+                    teleop_controller.set_command((e.y or 0.0) * (max_linear.value or 0.0),
+                                                  -(e.x or 0.0) * (max_angular.value or 0.0))
+
+                # 摇杆只在移动时发送事件，按住不动期间由浏览器定时发送心跳
+                def handle_joystick_start(_):
+                    ui.run_javascript(f'''
+                        clearInterval(window._teleopHeartbeat);
+                        window._teleopHeartbeat = setInterval(() => emitEvent('teleop_heartbeat'),
+                                                              {int(teleop_controller.deadman_timeout * 400)});
+                    ''')
+
+                def handle_joystick_end(_):
+                    ui.run_javascript('clearInterval(window._teleopHeartbeat);')
+                    if enable_switch.value:
+                        teleop_controller.set_command(0.0, 0.0)
+
+                def handle_heartbeat(_):
+                    if enable_switch.value:
+                        teleop_controller.keepalive()
+
+                ui.on('teleop_heartbeat', handle_heartbeat)
+
+                ui.joystick(color='#4f6db9', size=80,
+                            on_start=handle_joystick_start,
+                            on_move=handle_joystick_move,
+                            on_end=handle_joystick_end).classes('w-64 h-64 bg-blue-50')
+
+                latency_label = ui.label('Latency: N/A').classes('text-body2')
+                publish_count_label = ui.label('Published: 0').classes('text-body2 text-grey')
+
+                def update_latency_display():
+                    """更新发布延迟显示"""
+                    stats = teleop_controller.get_latency_stats()
+                    latency_label.set_text(f"Latency: last {stats['last']:.2f} ms, mean {stats['mean']:.2f} ms, "
+                                           f"p95 {stats['p95']:.2f} ms, max {stats['max']:.2f} ms")
+                    publish_count_label.set_text(f"Published: {teleop_controller.publish_count}")
+
+                ui.timer(0.5, update_latency_display)
+
+            # 导航目标
+            with ui.card():
+                ui.label('Goal').classes('text-h6 font-bold')
+                goal_topic_input = ui.input(label='Topic', value='/goal_pose').classes('w-64')
+                frame_input = ui.input(label='Frame', value='map').classes('w-64')
+                goal_x = ui.number(label='X (m)', value=0.0).classes('w-64')
+                goal_y = ui.number(label='Y (m)', value=0.0).classes('w-64')
+                goal_yaw = ui.number(label='Yaw (deg)', value=0.0).classes('w-64')
+
+                def handle_goal_click():
+                    """处理发送目标按钮点击"""
+                    success = send_goal(goal_x.value or 0.0, goal_y.value or 0.0,
+                                        math.radians(goal_yaw.value or 0.0),
+                                        frame_id=frame_input.value or 'map',
+                                        topic_name=goal_topic_input.value or '/goal_pose')
+                    if success:
+                        ui.notify('目标已发送', type='positive', position='top')
+                    else:
+                        ui.notify('发送目标失败: ROS未连接', type='negative', position='top')
+
+                ui.button('Send Goal', on_click=handle_goal_click)
@@ -1,15 +1,24 @@
 from nicegui import ui
-from ui_function.topic_controller import handle_topic_click
+from ui_function.topic_controller import handle_topic_click, start_recording, stop_recording
+import ui_function.topic_controller as topic_controller
 from ui_function.get_object import get_object_instance
 from ros.ros_topic import RosTopic
-from ui_function.image_process import handle_image_message
+from ui_function.image_process import handle_image_message, process_image_message, ImageBufferPool
+from ui_function.image_delta import TileDeltaEncoder, DELTA_CANVAS_SCRIPT
 from ui_function.bridge_controller import BridgeController
+from ui_function.topic_picker import TopicPicker
+from device.telemetry import get_device_telemetry
+from ros.message_schema import get_message_schema_cache
 
+import json
 import logging
 import asyncio
+import numpy as np
 
 device_instance,ros_bridge_instance,ssh_instance = get_object_instance()
 bridge_controller = BridgeController()
+device_telemetry = get_device_telemetry()
+message_schema_cache = get_message_schema_cache()
 
 @ui.page('/topic_page')
 def topic_page():
@@ -19,6 +28,10 @@ def topic_page():
     with ui.header(elevated=True).style('background-color: #4f6db9'):
         ui.link('Qualcomm Robotics SDK', '/').classes('text-red-500')
         ui.link('Topic', '/topic_page').classes('text-red-500')
+        ui.link('Mosaic', '/mosaic_page').classes('text-red-500')
+        ui.link('Graph', '/graph_page').classes('text-red-500')
+        ui.link('Teleop', '/teleop_page').classes('text-red-500')
+        ui.link('Files', '/file_page').classes('text-red-500')
     
     # 主内容区域 - 数据展示
     with ui.column().classes('w-full p-4'):
@@ -29,21 +42,171 @@ def topic_page():
         with ui.card().classes('w-full mt-4'):
             # 消息显示区域
             topic_name_type = ui.label('Please select topic to view').classes('text-body1 mt-2')
+            # 带header.stamp的消息显示经过时钟偏差修正的端到端延迟
+            latency_label = ui.label('').classes('text-body2 text-grey')
             
+            # 字段过滤，在接收消息时只保留关心的字段
+            with ui.row().classes('w-full items-center'):
+                filter_input = ui.input(label='Field Filter',
+                                        placeholder="pose.position, header.stamp 或 = msg['data'][0]").classes('w-96')
+
+                def handle_filter_apply():
+                    """应用字段过滤规则"""
+                    success, message = RosTopic.get_instance().set_message_filter(filter_input.value)
+                    ui.notify(message, type='positive' if success else 'negative', position='top')
+
+                ui.button('Apply', on_click=handle_filter_apply)
+                filter_input.on('keydown.enter', handle_filter_apply)
+
+                def handle_schema_reload():
+                    """重新获取当前设备上所有已缓存的消息定义"""
+                    message_schema_cache.invalidate(force=True)
+                    ui.notify('正在重新获取消息定义', position='top')
+
+                ui.button('Reload Definitions', on_click=handle_schema_reload).props('flat')
+
             # 消息内容区域（使用代码块显示格式化的消息）
-            message_content = ui.label().classes('w-full mt-2 max-h-96 overflow-auto')
+            message_content = ui.label().classes('w-full mt-2 max-h-96 overflow-auto whitespace-pre-wrap font-mono')
+            # 录像控制，仅图像topic可见
+            with ui.row().classes('items-center') as record_row:
+                async def handle_record_click():
+                    """开始或停止录像"""
+                    if topic_controller.current_recorder is None:
+                        recorder = start_recording()
+                        if recorder is None:
+                            ui.notify('请先订阅图像topic', type='warning', position='top')
+                            return
+                        record_button.set_text('Stop Recording')
+                        record_button.props('color=negative')
+                    else:
+                        loop = asyncio.get_event_loop()
+                        recorder = await loop.run_in_executor(None, stop_recording)
+                        record_button.set_text('Record Video')
+                        record_button.props('color=primary')
+                        if recorder is not None:
+                            ui.notify(f"录像已保存: {recorder.output_path}", type='positive', position='top')
+
+                record_button = ui.button('Record Video', on_click=handle_record_click)
+                record_status_label = ui.label('').classes('text-body2 text-grey')
+
+                # 增量模式：只发送变化的图像块，适合画面大部分静止的相机
+                delta_encoder = TileDeltaEncoder()
+                delta_state = {'message': None}
+                # 每个页面使用自己的解码缓冲池
+                image_pool = ImageBufferPool('topic_page')
+
+                def handle_delta_change(e):
+                    """切换增量模式时重新发送关键帧"""
+                    delta_encoder.reset()
+                    delta_state['message'] = None
+
+                def update_pool_status():
+                    """显示解码缓冲池的复用情况，稳定运行时池内分配不应增长，其余为每帧无法复用的分配"""
+                    pool_stats = image_pool.get_stats()
+                    frames = max(pool_stats['frames'], 1)
+                    pool_status_label.set_text(f"decoded {pool_stats['frames']} frames, "
+                                               f"{pool_stats['allocations']} pooled buffer allocations, "
+                                               f"{pool_stats['unpooled_allocations'] / frames:.1f} unpooled allocations "
+                                               f"({pool_stats['unpooled_bytes'] / frames / 1024:.0f} KB) per frame")
+
+                delta_checkbox = ui.checkbox('Delta Mode', on_change=handle_delta_change)
+                delta_status_label = ui.label('').classes('text-body2 text-grey')
+                pool_status_label = ui.label('').classes('text-body2 text-grey')
+            record_row.set_visibility(False)
+
             # 使用原生HTML img标签避免闪烁，配合JavaScript直接更新
             ui.html('<img id="video_frame" style="width:100%; height:auto; background: #000; border-radius: 8px; object-fit: contain; display: none;" />', sanitize=False)
+            # 增量模式下在canvas上合成图像块
+            ui.add_body_html(DELTA_CANVAS_SCRIPT)
+            delta_frame = ui.html('<canvas id="delta_frame" style="width:100%; height:auto; background: #000; border-radius: 8px;"></canvas>', sanitize=False).classes('w-full')
+            delta_frame.set_visibility(False)
             
             def update_message_display():
                 """更新消息显示"""
-                if RosTopic.cls_latest_message:
+                if RosTopic.cls_latest_message is not None:
                     topic_name_type.set_text(f'Subscribe Topic {RosTopic.cls_current_topic_name}, Topic type is {RosTopic.cls_current_topic_type}')
+                    latency = None
+                    if RosTopic.cls_latest_stamp is not None:
+                        latency = ros_bridge_instance.get_message_latency(RosTopic.cls_latest_stamp,
+                                                                          RosTopic.cls_latest_receive_time)
+                    latency_label.set_text(f"End-to-end latency: {latency * 1000:.1f} ms" if latency is not None else '')
+
+                    schema = None
+                    if isinstance(RosTopic.cls_latest_message, np.ndarray):
+                        # 接收进程模式下图像已在接收进程中解码为BGR
+                        render_kind = 'image'
+                    else:
+                        # 根据缓存的消息定义决定渲染方式，定义尚未获取时按类型名判断
+                        schema = message_schema_cache.get_schema(RosTopic.cls_current_topic_type, fetch=False)
+                        if schema is not None and RosTopic.cls_current_filter is None \
+                                and not schema.matches(RosTopic.cls_latest_message):
+                            # 字段与缓存的定义不符，设备上的消息定义已变化，重新获取
+                            message_schema_cache.invalidate(RosTopic.cls_current_topic_type)
+                            schema = None
+                        if schema is not None:
+                            render_kind = schema.render_kind
+                        elif RosTopic.cls_current_topic_type == 'sensor_msgs/msg/Image':
+                            render_kind = 'image'
+                        elif RosTopic.cls_current_topic_type == 'std_msgs/msg/String':
+                            render_kind = 'text'
+                        else:
+                            render_kind = 'tree'
+                    # 设置了字段过滤时消息只包含投影结果
+                    if RosTopic.cls_current_filter is not None:
+                        render_kind = 'filtered'
+
+                    recorder = topic_controller.current_recorder
+                    # 录像过程中设置字段过滤后仍需能停止录像
+                    record_row.set_visibility(render_kind == 'image' or recorder is not None)
+                    if recorder is not None and recorder.error is not None:
+                        # 录像线程已因错误结束，恢复按钮状态
+                        stop_recording()
+                        record_button.set_text('Record Video')
+                        record_button.props('color=primary')
+                        record_status_label.set_text('')
+                        ui.notify(f"录像失败: {recorder.error}", type='negative', position='top')
+                    elif recorder is not None:
+                        status = recorder.get_status()
+                        record_status_label.set_text(f"REC {status['frames_written']} frames, "
+                                                     f"dropped {status['frames_dropped']}")
+                    else:
+                        record_status_label.set_text('')
 
-                    if RosTopic.cls_current_topic_type == 'sensor_msgs/msg/Image':
+                    delta_frame.set_visibility(render_kind == 'image' and delta_checkbox.value)
+                    if render_kind == 'image' and delta_checkbox.value:
+                        # 增量模式，只有收到新消息时才编码变化的图像块
+                        image_origin, image_seq = RosTopic.cls_latest_frame
+                        if image_origin is not None and image_origin is not delta_state['message']:
+                            delta_state['message'] = image_origin
+                            img = process_image_message(image_origin, image_pool)
+                            payload = delta_encoder.encode(img) if img is not None else None
+                            if not RosTopic.get_instance().is_frame_intact(image_seq):
+                                # 共享内存中的图像在编码期间被覆盖，下一帧重新发送关键帧
+                                delta_encoder.reset()
+                                delta_state['message'] = None
+                                payload = None
+                            update_pool_status()
+                            if payload is not None:
+                                payload['canvas'] = 'delta_frame'
+                                ui.run_javascript(f'window.applyImageDelta && window.applyImageDelta({json.dumps(payload)});')
+                            if delta_encoder.full_frame_bytes:
+                                delta_status_label.set_text(f"sent {delta_encoder.bytes_sent / 1024:.0f} KB, "
+                                                            f"keyframe {delta_encoder.full_frame_bytes / 1024:.0f} KB")
+                        message_content.set_visibility(False)
+                        ui.run_javascript('''
+                            const img = document.getElementById("video_frame");
+                            if (img) {
+                                img.style.display = "none";
+                            }
+                        ''')
+                    elif render_kind == 'image':
                         # 显示图片，隐藏文本
-                        image_origin = RosTopic.cls_latest_message
-                        img_base64 = handle_image_message(image_origin)
+                        image_origin, image_seq = RosTopic.cls_latest_frame
+                        img_base64 = handle_image_message(image_origin, image_pool) if image_origin is not None else None
+                        if not RosTopic.get_instance().is_frame_intact(image_seq):
+                            # 共享内存中的图像在编码期间被覆盖，跳过这一帧
+                            img_base64 = None
+                        update_pool_status()
                         if img_base64:
                             # 使用JavaScript直接更新img标签，避免闪烁
                             ui.run_javascript(f'''
@@ -64,7 +227,18 @@ def topic_page():
                                     img.style.display = "none";
                                 }
                             ''')
-                    elif RosTopic.cls_current_topic_type == 'std_msgs/msg/String':
+                    elif render_kind == 'filtered':
+                        # 显示字段过滤结果，隐藏图片
+                        message_content.set_text(f"过滤: {RosTopic.cls_current_filter}\n"
+                                                 f"{json.dumps(RosTopic.cls_latest_message, indent=2, default=str)}")
+                        message_content.set_visibility(True)
+                        ui.run_javascript('''
+                            const img = document.getElementById("video_frame");
+                            if (img) {
+                                img.style.display = "none";
+                            }
+                        ''')
+                    elif render_kind == 'text':
                         # 显示文本，隐藏图片
                         message_content.set_text(RosTopic.cls_latest_message['data'])
                         message_content.set_visibility(True)
@@ -75,8 +249,12 @@ def topic_page():
                             }
                         ''')
                     else:
-                        # 其他类型的消息
-                        message_content.set_text(f"消息类型: {RosTopic.cls_current_topic_type}\n数据: {str(RosTopic.cls_latest_message)}")
+                        # 其他类型的消息，有消息定义时按字段结构渲染
+                        if schema is not None:
+                            message_text = schema.render_text(RosTopic.cls_latest_message)
+                        else:
+                            message_text = str(RosTopic.cls_latest_message)
+                        message_content.set_text(f"消息类型: {RosTopic.cls_current_topic_type}\n数据:\n{message_text}")
                         message_content.set_visibility(True)
                         ui.run_javascript('''
                             const img = document.getElementById("video_frame");
@@ -87,6 +265,7 @@ def topic_page():
                 else:
                     # 没有消息时，显示提示信息
                     topic_name_type.set_text('Please select topic to view')
+                    latency_label.set_text('')
                     message_content.set_text('')
                     message_content.set_visibility(True)
                     ui.run_javascript('''
@@ -111,6 +290,56 @@ def topic_page():
                 ros_host_label = ui.label('Ros Bridge Port: Disconnected').classes('text-body2')
                 ssh_status_label = ui.label('SSH: Disconnected').classes('text-body2')
                 update_time_label = ui.label('N/A').classes('text-body2 text-grey')
+                # 桥接往返时间和主机-设备时钟偏差
+                rtt_label = ui.label('RTT: N/A').classes('text-body2')
+                offset_label = ui.label('Clock Offset: N/A').classes('text-body2')
+
+                # 设备遥测信息
+                cpu_label = ui.label('CPU: N/A').classes('text-body2')
+                mem_label = ui.label('Memory: N/A').classes('text-body2')
+                temp_label = ui.label('Temp: N/A').classes('text-body2')
+                gpu_label = ui.label('GPU/NPU: N/A').classes('text-body2')
+                disk_label = ui.label('Disk: N/A').classes('text-body2')
+                telemetry_chart = ui.echart({
+                    'grid': {'left': 30, 'right': 10, 'top': 20, 'bottom': 20},
+                    'legend': {'data': ['CPU', 'Memory'], 'textStyle': {'fontSize': 10}},
+                    'xAxis': {'type': 'time', 'axisLabel': {'show': False}},
+                    'yAxis': {'type': 'value', 'min': 0, 'max': 100},
+                    'series': [
+                        {'name': 'CPU', 'type': 'line', 'showSymbol': False, 'data': []},
+                        {'name': 'Memory', 'type': 'line', 'showSymbol': False, 'data': []},
+                    ],
+                }).classes('w-64 h-32')
+
+                def format_percent(value):
+                    return f"{value:.1f}%" if value is not None else 'N/A'
+
+                def update_telemetry_display():
+                    """更新设备遥测显示"""
+                    sample = device_telemetry.get_latest()
+                    if sample is None:
+                        return
+
+                    cpu_label.set_text(f"CPU: {format_percent(sample['cpu'])}")
+                    mem_label.set_text(f"Memory: {format_percent(sample['mem'])}")
+                    temp = f"{sample['temp']:.1f}°C" if sample['temp'] is not None else 'N/A'
+                    temp_label.set_text(f"Temp: {temp}")
+                    gpu_label.set_text(f"GPU/NPU: {format_percent(sample['gpu'])} / {format_percent(sample['npu'])}")
+                    disk_label.set_text(f"Disk: {format_percent(sample['disk'])}")
+
+                    # echarts时间轴使用毫秒
+                    for series, key in zip(telemetry_chart.options['series'], ('cpu', 'mem')):
+                        series['data'] = [[t * 1000, v] for t, v in device_telemetry.get_series(key)]
+                    telemetry_chart.update()
+
+                def update_clock_display():
+                    """更新往返时间和时钟偏差显示"""
+                    clock = ros_bridge_instance.get_clock_status()
+                    if clock['rtt'] is None or clock['offset'] is None:
+                        return
+                    rtt_label.set_text(f"RTT: {clock['rtt'] * 1000:.1f} ms (min {clock['min_rtt'] * 1000:.1f} ms)")
+                    offset_label.set_text(f"Clock Offset: {clock['offset'] * 1000:+.1f} ms, "
+                                          f"drift {clock['drift_ppm']:+.0f} ppm")
 
                 def update_status_display():
                     """更新状态栏显示"""
@@ -127,50 +356,55 @@ def topic_page():
                     # 更新时间
                     import datetime
                     update_time_label.set_text(datetime.datetime.now().strftime('%H:%M:%S'))
+
+                    update_clock_display()
+                    update_telemetry_display()
         # Topic process
         with ui.column():
             ui.label('ROS Topics').classes('text-h6 font-bold mt-6')
             
-            # Topic列表容器
-            topic_list_item = ui.dropdown_button("Select Topic", auto_close=True)
-            
+            # Topic选择器：topic列表下发到浏览器，输入时在浏览器端过滤
+            topic_select = TopicPicker(
+                bridge_controller.topic_index,
+                label='Select Topic',
+                on_select=lambda topic_name: on_topic_select(topic_name),
+            ).classes('w-64')
+            refreshing = {'value': False}
+
+            def on_topic_select(topic_name):
+                """处理topic选择事件"""
+                if topic_name:
+                    handle_topic_click({'name': topic_name, 'type': bridge_controller.topic_index.get_type(topic_name)})
+
             async def refresh_topics():
-                """异步刷新topic列表"""
-                # 清空下拉菜单
-                topic_list_item.clear()
-                
-                # 显示加载状态
-                topic_list_item.props('loading')
+                """异步刷新topic索引，只有topic列表变化时才更新选项"""
+                if refreshing['value']:
+                    return
+                refreshing['value'] = True
                 
                 try:
                     # 在后台线程中执行耗时操作，避免阻塞UI
                     loop = asyncio.get_event_loop()
-                    topic_list = await loop.run_in_executor(
+                    added, removed = await loop.run_in_executor(
                         None,  # 使用默认线程池
-                        bridge_controller.get_all_topics
+                        bridge_controller.refresh_topic_index
                     )
                     
-                    logging.info(f"刷新topic列表，获取到 {len(topic_list)} 个topics")
+                    if added or removed:
+                        logging.info(f"topic列表变化: 新增 {len(added)} 个, 移除 {len(removed)} 个")
                     
-                    # 添加topic项到下拉菜单
-                    with topic_list_item:
-                        for topic in topic_list:
-                            topic_name = topic['name']
-                            ui.item(topic_name, on_click=lambda t=topic: handle_topic_click(t))
+                    # 索引版本变化时（包括其他页面触发的刷新）只下发差异
+                    topic_select.sync()
                             
                 except Exception as e:
                     logging.error(f"刷新topic列表失败: {e}")
                     ui.notify(f"获取topic列表失败: {e}", type='negative', position='top')
                 finally:
-                    # 移除加载状态
-                    topic_list_item.props(remove='loading')
-            
-            def on_topic_button_click():
-                """处理topic按钮点击事件"""
-                asyncio.create_task(refresh_topics())
+                    refreshing['value'] = False
             
-            # 设置点击事件，点击下拉按钮时刷新topic列表
-            topic_list_item.on_click(on_topic_button_click)
+            # 定时在后台刷新topic列表
+            ui.timer(5.0, refresh_topics)
+            ui.timer(0.1, refresh_topics, once=True)
 
     def update_timer():
         # 定时更新状态栏
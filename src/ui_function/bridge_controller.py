@@ -3,7 +3,8 @@ Topic Controller
 处理ROS topic列表的业务逻辑，与UI分离
 """
 from ros.ros_bridge import get_ros_bridge
-from typing import List, Dict, Optional
+from ros.topic_index import TopicIndex
+from typing import List, Dict, Optional, Tuple
 
 
 class BridgeController:
@@ -12,6 +13,7 @@ class BridgeController:
     def __init__(self):
         """初始化控制器"""
         self.ros_bridge = get_ros_bridge()
+        self.topic_index = TopicIndex()
         
     def get_all_topics(self) -> List[Dict[str, str]]:
         """获取所有ROS topic
@@ -37,5 +39,13 @@ class BridgeController:
         """
         topics = self.get_all_topics()
         return len(topics)
-    
-    
\ No newline at end of file
+
+    def refresh_topic_index(self) -> Tuple[List[Dict[str, str]], List[str]]:
+        """重新获取topic列表并增量更新索引
+
+        Returns:
+            Tuple[List[Dict[str, str]], List[str]]: (新增或类型变化的topic, 已移除的topic名称)
+        """
+        if not self.ros_bridge.ros_is_connected:
+            return [], []
+        return self.topic_index.update(self.get_all_topics())
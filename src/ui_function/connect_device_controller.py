@@ -4,6 +4,7 @@
 from ros.ros_bridge import get_ros_bridge
 from device.device import get_device
 from ssh.ssh import get_ssh_manager
+from device.telemetry import get_device_telemetry
 import datetime
 import logging
 
@@ -16,6 +17,7 @@ class ConnectDeviceController:
         self.ros_bridge = get_ros_bridge()
         self.ssh_manager = get_ssh_manager()
         self.device = get_device()
+        self.device_telemetry = get_device_telemetry()
     
     def init_bridge_ssh(self, ip_address: str, ssh_port: int = 22, ros_port: int = 9090, 
                          username: str = "root", password: str = None) -> tuple[bool, str]:
@@ -62,6 +64,12 @@ class ConnectDeviceController:
             except Exception as ssh_e:
                 logging.warning(f"SSH连接尝试失败: {ssh_e}")
             
+            # SSH连接成功后启动设备遥测采集，失败时停止旧设备的采集
+            if ssh_success:
+                self.device_telemetry.start()
+            else:
+                self.device_telemetry.stop()
+            
             if ros_success:
                 message = f"成功连接到设备 {ip_address}"
                 if ssh_success:
@@ -0,0 +1,126 @@
+"""
+图像分块增量编码 - 只发送与上一帧相比发生变化的图像块
+将帧按固定大小分块，用NumPy向量化比较找出变化块，只编码变化块；
+定期或变化面积过大时发送完整关键帧，浏览器端将图像块绘制到canvas上合成
+"""
+import base64
+from typing import Optional, Dict, Any
+
+import cv2
+import numpy as np
+
+
+# 浏览器端的合成函数，页面加载时注入一次
+DELTA_CANVAS_SCRIPT = '''
+<script>
+window.applyImageDelta = function (payload) {
+    const canvas = document.getElementById(payload.canvas);
+    if (!canvas) {
+        return;
+    }
+    // 先并行解码本帧所有图像块，再按帧顺序绘制，保证旧帧不会覆盖新帧
+    const bitmaps = Promise.all(payload.tiles.map(
+        tile => fetch('data:image/png;base64,' + tile[2]).then(r => r.blob()).then(b => createImageBitmap(b))
+    ));
+    window._imageDeltaChain = (window._imageDeltaChain || Promise.resolve()).then(() => bitmaps).then(images => {
+        if (canvas.width !== payload.width || canvas.height !== payload.height) {
+            canvas.width = payload.width;
+            canvas.height = payload.height;
+        }
+        const ctx = canvas.getContext('2d');
+        images.forEach((image, i) => ctx.drawImage(image, payload.tiles[i][0], payload.tiles[i][1]));
+    }).catch(() => {});
+};
+</script>
+'''
+
+
+class TileDeltaEncoder:
+    """分块增量编码器，每个显示端使用一个实例"""
+
+    def __init__(self, tile_size: int = 64, keyframe_interval: int = 100, max_changed_ratio: float = 0.5):
+        """初始化编码器
+
+        Args:
+            tile_size: 图像块边长（像素）
+            keyframe_interval: 每隔多少帧强制发送一次关键帧
+            max_changed_ratio: 变化块比例超过该值时直接发送关键帧
+        """
+        self.tile_size = tile_size
+        self.keyframe_interval = keyframe_interval
+        self.max_changed_ratio = max_changed_ratio
+        self.frames_since_keyframe = 0
+        self.bytes_sent = 0
+        self.full_frame_bytes = 0
+        self._shape = None
+        self._current = None
+        self._previous = None
+
+    def reset(self):
+        """丢弃参考帧，下一帧发送关键帧（例如浏览器重新连接后）"""
+        self._shape = None
+
+    def _allocate(self, shape: tuple):
+        """按块大小向上取整预分配当前帧和参考帧缓冲"""
+        height, width = shape[:2]
+        padded_height = -(-height // self.tile_size) * self.tile_size
+        padded_width = -(-width // self.tile_size) * self.tile_size
+        padded_shape = (padded_height, padded_width) + tuple(shape[2:])
+        self._current = np.zeros(padded_shape, dtype=np.uint8)
+        self._previous = np.zeros(padded_shape, dtype=np.uint8)
+        self._shape = shape
+
+    @staticmethod
+    def _encode_png(img: np.ndarray) -> str:
+        _, buffer = cv2.imencode('.png', img)
+        return base64.b64encode(buffer).decode('utf-8')
+
+    def encode(self, img: np.ndarray) -> Optional[Dict[str, Any]]:
+        """编码一帧
+
+        Args:
+            img: BGR或灰度图像
+
+        Returns:
+            Optional[Dict[str, Any]]: 发送给浏览器的数据，包含width/height/key/tiles，
+                tiles为[x, y, base64 PNG]列表；与上一帧完全相同时返回None
+        """
+        height, width = img.shape[:2]
+        keyframe = img.shape != self._shape or self.frames_since_keyframe >= self.keyframe_interval
+        if img.shape != self._shape:
+            self._allocate(img.shape)
+
+        # 交换缓冲区，当前帧写入预分配的带填充缓冲
+        self._current, self._previous = self._previous, self._current
+        self._current[:height, :width] = img
+
+        tiles = []
+        if not keyframe:
+            # 将帧视为(块行, 块高, 块列, 块宽, ...)，一次比较得到每个块是否变化
+            rows = self._current.shape[0] // self.tile_size
+            columns = self._current.shape[1] // self.tile_size
+            block_shape = (rows, self.tile_size, columns, self.tile_size) + self._current.shape[2:]
+            diff = self._current.reshape(block_shape) != self._previous.reshape(block_shape)
+            changed = diff.any(axis=tuple(i for i in range(diff.ndim) if i not in (0, 2)))
+
+            changed_rows, changed_columns = np.nonzero(changed)
+            if len(changed_rows) == 0:
+                self.frames_since_keyframe += 1
+                return None
+            if len(changed_rows) > self.max_changed_ratio * rows * columns:
+                keyframe = True
+            else:
+                for row, column in zip(changed_rows.tolist(), changed_columns.tolist()):
+                    y, x = row * self.tile_size, column * self.tile_size
+                    tile = img[y:min(y + self.tile_size, height), x:min(x + self.tile_size, width)]
+                    tiles.append([x, y, self._encode_png(tile)])
+
+        if keyframe:
+            tiles = [[0, 0, self._encode_png(img)]]
+            self.frames_since_keyframe = 0
+            self.full_frame_bytes = len(tiles[0][2])
+        else:
+            self.frames_since_keyframe += 1
+
+        self.bytes_sent += sum(len(tile[2]) for tile in tiles)
+        return {'width': width, 'height': height, 'key': keyframe, 'tiles': tiles}
@@ -1,37 +1,157 @@
 import cv2
 import base64
+import binascii
+import weakref
 import numpy as np
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, List
 
-def nv12_to_bgr(nv12_image, width, height):
+# 所有存活的缓冲池，供状态接口汇总统计
+_pools = weakref.WeakSet()
+
+
+class ImageBufferPool:
+    """图像转换输出缓冲池，按(宽, 高, 编码)复用预分配的数组
+
+    返回的图像在同一个池的下一次调用时会被覆盖，因此每个使用方（页面、录像线程、拼接器）
+    各自持有一个池，并在下一帧之前用完上一帧。
+    池只复用颜色转换的输出数组；每帧a2b_base64解码得到的bytes、imencode输出和base64字符串
+    无法复用，通过record_unpooled单独统计次数和字节数，以反映实际的内存分配量。
+    """
+
+    def __init__(self, name: str = '', max_entries: int = 8):
+        """初始化缓冲池
+
+        Args:
+            name: 使用方名称，显示在统计中
+            max_entries: 最多保留的缓冲数量，分辨率变化时淘汰最久未使用的缓冲
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self._buffers = OrderedDict()
+        # 新分配池内数组的次数，稳定运行时不应增长
+        self.allocations = 0
+        # 每帧无法复用的分配次数和字节数
+        self.unpooled_allocations = 0
+        self.unpooled_bytes = 0
+        # 成功转换的帧数
+        self.frames = 0
+        _pools.add(self)
+
+    def get(self, key: tuple, shape: tuple) -> np.ndarray:
+        """获取指定形状的缓冲，不存在时分配
+
+        Args:
+            key: (宽, 高, 编码)
+            shape: 数组形状
+
+        Returns:
+            np.ndarray: uint8缓冲，内容未定义
+        """
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self.allocations += 1
+            self._buffers[key] = buffer
+            while len(self._buffers) > self.max_entries:
+                self._buffers.popitem(last=False)
+        self._buffers.move_to_end(key)
+        return buffer
+
+    def record_unpooled(self, num_bytes: int):
+        """记录一次无法使用池内缓冲的分配
+
+        Args:
+            num_bytes: 分配的字节数
+        """
+        self.unpooled_allocations += 1
+        self.unpooled_bytes += num_bytes
+
+    def get_stats(self) -> dict:
+        """获取缓冲池统计
+
+        Returns:
+            dict: 包含name、frames、allocations、unpooled_allocations、unpooled_bytes
+                和当前池内缓冲占用的字节数
+        """
+        return {
+            'name': self.name,
+            'frames': self.frames,
+            'allocations': self.allocations,
+            'unpooled_allocations': self.unpooled_allocations,
+            'unpooled_bytes': self.unpooled_bytes,
+            'bytes': sum(buffer.nbytes for buffer in list(self._buffers.values())),
+        }
+
+
+def get_pool_stats() -> List[dict]:
+    """获取本进程中所有缓冲池的统计"""
+    return [pool.get_stats() for pool in list(_pools)]
+
+
+def nv12_to_bgr(nv12_image, width, height, dst=None):
         """
         Convert NV12 image to BGR format.
         """
         yuv = nv12_image.reshape((height * 3 // 2, width))
-        bgr = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_NV12)
+        bgr = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_NV12, dst=dst)
         return bgr
 
-def process_image_message(msg) -> Optional[np.ndarray]:
-    """将 ROS 消息转换为 numpy 图像数组"""
+def decode_image_data(data) -> np.ndarray:
+    """解码消息中的图像数据
+
+    a2b_base64可以直接接受ASCII字符串，省去base64.b64decode先编码为bytes的一次整帧复制；
+    解码结果只分配一次，之后通过np.frombuffer零拷贝使用
+    """
+    return np.frombuffer(binascii.a2b_base64(data), dtype=np.uint8)
+
+def process_image_message(msg, pool: Optional[ImageBufferPool] = None) -> Optional[np.ndarray]:
+    """将 ROS 消息转换为 numpy 图像数组
+
+    Args:
+        msg: sensor_msgs/Image消息，或接收进程模式下已解码的BGR图像
+        pool: 可选的缓冲池，颜色转换直接写入池中的预分配数组；
+            不提供时每帧分配新数组
+
+    Returns:
+        Optional[np.ndarray]: BGR图像，bgr8时为解码数据的只读视图
+    """
+    if isinstance(msg, np.ndarray):
+        if pool is not None:
+            pool.frames += 1
+        return msg
     try:
-        image_bytes = base64.b64decode(msg['data'])
-        img_array = np.frombuffer(image_bytes, dtype=np.uint8)
-        
-        if msg['encoding'] == 'bgr8':
-            return img_array.reshape((msg['height'], msg['width'], 3))
-        elif msg['encoding'] == 'rgb8':
-            return img_array.reshape((msg['height'], msg['width'], 3))
-        elif msg['encoding'] == 'nv12':
-            return nv12_to_bgr(img_array, msg['width'], msg['height'])
+        img_array = decode_image_data(msg['data'])
+        if pool is not None:
+            pool.record_unpooled(img_array.nbytes)
+        width, height, encoding = msg['width'], msg['height'], msg['encoding']
+
+        if encoding == 'bgr8':
+            img = img_array.reshape((height, width, 3))
+        elif encoding == 'rgb8':
+            dst = pool.get((width, height, encoding), (height, width, 3)) if pool is not None else None
+            img = cv2.cvtColor(img_array.reshape((height, width, 3)), cv2.COLOR_RGB2BGR, dst=dst)
+        elif encoding == 'nv12':
+            dst = pool.get((width, height, encoding), (height, width, 3)) if pool is not None else None
+            img = nv12_to_bgr(img_array, width, height, dst=dst)
+        else:
+            return None
     except Exception as e:
         return None
+    if pool is not None:
+        pool.frames += 1
+    return img
 
-def handle_image_message(msg):
+def handle_image_message(msg, pool: Optional[ImageBufferPool] = None):
 
-    if 'data' in msg and 'encoding' in msg:  
-        img = process_image_message(msg)
+    if isinstance(msg, np.ndarray) or ('data' in msg and 'encoding' in msg):
+        img = process_image_message(msg, pool)
         if img is not None:
+            # imencode的输出由OpenCV分配，无法写入预分配缓冲
             _, buffer = cv2.imencode('.png', img)
-            img_base64 = base64.b64encode(buffer).decode('utf-8')
+            encoded = base64.b64encode(buffer)
+            img_base64 = encoded.decode('utf-8')
+            if pool is not None:
+                for num_bytes in (buffer.nbytes, len(encoded), len(img_base64)):
+                    pool.record_unpooled(num_bytes)
             return img_base64
- 
\ No newline at end of file
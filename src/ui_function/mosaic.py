@@ -0,0 +1,153 @@
+"""
+多相机拼接 - 在服务端将多个图像topic的最新帧合成为一张网格图像
+每个格子是预分配画布上的视图，图像直接缩放写入格子；
+只有收到新帧的格子才重新解码和缩放，每个周期只编码和发送一张图像
+"""
+import math
+import time
+import base64
+from typing import Optional, List, Tuple
+
+import cv2
+import numpy as np
+
+from ros.topic_hub import get_ros_topic_hub
+from ui_function.image_process import process_image_message, ImageBufferPool
+
+
+# 可选的布局（列数, 行数），auto根据topic数量自动计算
+MOSAIC_LAYOUTS = {
+    'auto': None,
+    '1x2': (1, 2),
+    '2x1': (2, 1),
+    '2x2': (2, 2),
+    '3x2': (3, 2),
+    '2x3': (2, 3),
+    '3x3': (3, 3),
+}
+
+# 可选的输出分辨率
+MOSAIC_RESOLUTIONS = {
+    '640x360': (640, 360),
+    '960x540': (960, 540),
+    '1280x720': (1280, 720),
+    '1920x1080': (1920, 1080),
+}
+
+# 格子顶部显示topic名称和帧龄的标签高度
+LABEL_HEIGHT = 18
+
+
+def resolve_layout(layout: str, topic_count: int) -> Tuple[int, int]:
+    """计算布局的(列数, 行数)"""
+    grid = MOSAIC_LAYOUTS.get(layout)
+    if grid is not None:
+        return grid
+    columns = max(1, math.ceil(math.sqrt(topic_count)))
+    rows = max(1, math.ceil(topic_count / columns))
+    return columns, rows
+
+
+class MosaicCompositor:
+    """多相机拼接合成器"""
+
+    def __init__(self, topics: List[Tuple[str, str]], layout: str = 'auto',
+                 resolution: Tuple[int, int] = (1280, 720), jpeg_quality: int = 80):
+        """初始化合成器并预分配画布
+
+        Args:
+            topics: (topic名称, 消息类型) 列表
+            layout: 布局名称，见MOSAIC_LAYOUTS
+            resolution: 输出分辨率(宽, 高)
+            jpeg_quality: JPEG编码质量
+        """
+        self.columns, self.rows = resolve_layout(layout, len(topics))
+        # 超出格子数量的topic不订阅
+        self.topics = topics[:self.columns * self.rows]
+        self.width, self.height = resolution
+        self.jpeg_quality = jpeg_quality
+        self.hub = get_ros_topic_hub()
+
+        self.tile_width = self.width // self.columns
+        self.tile_height = self.height // self.rows
+        self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+        # 每个格子分为标签区和图像区，都是画布上的视图
+        self.tiles = []
+        for index in range(len(self.topics)):
+            row, column = divmod(index, self.columns)
+            x, y = column * self.tile_width, row * self.tile_height
+            tile = self.canvas[y:y + self.tile_height, x:x + self.tile_width]
+            self.tiles.append({
+                'label': tile[:LABEL_HEIGHT],
+                'image': tile[LABEL_HEIGHT:],
+                'seq': 0,
+            })
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        # 解码结果立即缩放写入格子，所有格子共用一个缓冲池
+        self.image_pool = ImageBufferPool('mosaic')
+
+    def start(self) -> bool:
+        """订阅所有topic
+
+        Returns:
+            bool: 是否全部订阅成功
+        """
+        success = True
+        for topic_name, topic_type in self.topics:
+            success = self.hub.subscribe(topic_name, topic_type) and success
+        return success
+
+    def stop(self):
+        """取消订阅所有topic"""
+        for topic_name, _ in self.topics:
+            self.hub.unsubscribe(topic_name)
+
+    def compose(self) -> np.ndarray:
+        """用各topic的最新帧更新画布
+
+        Returns:
+            np.ndarray: 合成后的画布（BGR），每次调用复用同一块内存
+        """
+        now = time.time()
+        image_height, image_width = self.tile_height - LABEL_HEIGHT, self.tile_width
+        for tile, (topic_name, _) in zip(self.tiles, self.topics):
+            for _ in range(3):
+                message, seq, receive_time = self.hub.get_latest(topic_name)
+                if message is None or seq == tile['seq']:
+                    break
+                # 接收进程模式下已经是解码后的图像
+                if isinstance(message, np.ndarray):
+                    img = message
+                else:
+                    img = process_image_message(message, self.image_pool)
+                if img is not None:
+                    if img.ndim == 2:
+                        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+                    cv2.resize(img, (image_width, image_height), dst=tile['image'],
+                               interpolation=cv2.INTER_AREA)
+                # 共享内存中的帧可能在缩放期间被接收进程覆盖，覆盖时重新读取最新帧
+                if self.hub.is_frame_intact(topic_name, seq):
+                    tile['seq'] = seq
+                    break
+
+            # 标签区每次整体重绘，帧龄随时间变化
+            tile['label'][:] = 32
+            if message is None:
+                text = f"{topic_name}  no data"
+            else:
+                text = f"{topic_name}  age {(now - receive_time) * 1000:.0f} ms"
+            cv2.putText(tile['label'], text, (4, LABEL_HEIGHT - 5), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.4, (255, 255, 255), 1, cv2.LINE_AA)
+        return self.canvas
+
+    def compose_jpeg_base64(self) -> Optional[str]:
+        """合成并编码为JPEG
+
+        Returns:
+            Optional[str]: base64编码的JPEG，编码失败时返回None
+        """
+        success, buffer = cv2.imencode('.jpg', self.compose(), self._encode_params)
+        if not success:
+            return None
+        return base64.b64encode(buffer).decode('utf-8')
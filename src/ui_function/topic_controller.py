@@ -4,6 +4,10 @@ Topic Controller - 管理ROS topic订阅和消息处理
 """
 
 from ros.ros_topic import RosTopic
+from ui_function.video_recorder import VideoRecorder, make_record_path
+
+# 当前的录像器，同一时间只录制一个topic
+current_recorder = None
 
 def handle_topic_click(topic):
     """处理topic点击事件，使用单例模式更新topic并订阅"""
@@ -11,6 +15,10 @@ def handle_topic_click(topic):
     # 获取单例实例
     topic_instance = RosTopic.get_instance()
     
+    # 切换topic时停止录像
+    if topic_instance.topic_name != topic['name']:
+        stop_recording()
+    
     # 使用update_topic方法，如果topic有变化会自动取消旧订阅并重新订阅
     success = topic_instance.update_topic(topic['name'], topic['type'])
     
@@ -18,3 +26,42 @@ def handle_topic_click(topic):
         print(f"成功处理topic点击: {topic['name']}")
     else:
         print(f"处理topic点击失败: {topic['name']}")
+
+
+def start_recording():
+    """开始录制当前订阅的图像topic
+
+    Returns:
+        VideoRecorder: 录像器，当前没有订阅topic时返回None
+    """
+    global current_recorder
+
+    topic_instance = RosTopic.get_instance()
+    if not topic_instance.is_subscribed:
+        return None
+
+    if current_recorder is not None and current_recorder.is_recording:
+        return current_recorder
+
+    current_recorder = VideoRecorder(make_record_path(topic_instance.topic_name))
+    current_recorder.start()
+    topic_instance.add_message_listener(current_recorder.add_message)
+    return current_recorder
+
+
+def stop_recording():
+    """停止录像
+
+    Returns:
+        VideoRecorder: 刚停止的录像器，没有在录像时返回None
+    """
+    global current_recorder
+
+    if current_recorder is None:
+        return None
+
+    RosTopic.get_instance().remove_message_listener(current_recorder.add_message)
+    recorder = current_recorder
+    current_recorder = None
+    recorder.stop()
+    return recorder
@@ -0,0 +1,80 @@
+// topic选择器：保存有序的topic列表，名称前缀匹配的结果排在子串匹配之前
+export default {
+  template: `
+    <q-select
+      :model-value="value"
+      :options="filtered"
+      :label="label"
+      use-input
+      clearable
+      emit-value
+      map-options
+      input-debounce="0"
+      @filter="filter"
+      @update:model-value="select"
+    />
+  `,
+  props: {
+    label: String,
+    topics: Array,
+  },
+  data() {
+    return {
+      names: [],
+      types: {},
+      filtered: [],
+      query: "",
+      value: null,
+    };
+  },
+  mounted() {
+    this.applyDiff(this.topics || [], []);
+  },
+  methods: {
+    applyDiff(added, removed) {
+      for (const name of removed) {
+        delete this.types[name];
+      }
+      for (const [name, type] of added) {
+        this.types[name] = type;
+      }
+      this.names = Object.keys(this.types).sort((a, b) => {
+        const x = a.toLowerCase();
+        const y = b.toLowerCase();
+        return x < y ? -1 : x > y ? 1 : a < b ? -1 : a > b ? 1 : 0;
+      });
+      if (this.value !== null && !(this.value in this.types)) {
+        this.value = null;
+      }
+      this.filtered = this.search(this.query);
+    },
+    search(query) {
+      const needle = (query || "").trim().toLowerCase();
+      const option = (name) => ({ label: `${name}  [${this.types[name]}]`, value: name });
+      if (!needle) {
+        return this.names.map(option);
+      }
+      const prefix = [];
+      const substring = [];
+      for (const name of this.names) {
+        const key = name.toLowerCase();
+        if (key.startsWith(needle)) {
+          prefix.push(option(name));
+        } else if (`${key} ${this.types[name].toLowerCase()}`.includes(needle)) {
+          substring.push(option(name));
+        }
+      }
+      return prefix.concat(substring);
+    },
+    filter(val, update) {
+      update(() => {
+        this.query = val;
+        this.filtered = this.search(val);
+      });
+    },
+    select(value) {
+      this.value = value === undefined ? null : value;
+      this.$emit("select", this.value);
+    },
+  },
+};
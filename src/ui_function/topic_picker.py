@@ -0,0 +1,53 @@
+"""
+Topic选择器 - topic列表保存在浏览器中，输入时由Quasar的@filter在浏览器端过滤
+首次渲染时下发完整的有序列表，之后只在索引版本变化时下发新增/移除的差异，
+输入过程中不需要与服务端往返
+"""
+from typing import Callable, Dict, Optional
+
+from nicegui import ui
+
+from ros.topic_index import TopicIndex
+
+
+class TopicPicker(ui.element, component='topic_picker.js'):
+    """基于TopicIndex的topic选择器"""
+
+    def __init__(self, topic_index: TopicIndex, label: str = 'Select Topic',
+                 on_select: Optional[Callable[[Optional[str]], None]] = None):
+        """初始化选择器
+
+        Args:
+            topic_index: topic索引
+            label: 输入框标签
+            on_select: 选中topic时的回调，参数为topic名称，清空时为None
+        """
+        super().__init__()
+        self.topic_index = topic_index
+        self.value = None
+        topics, self.version = topic_index.snapshot()
+        # 已下发到浏览器的topic，名称 -> 类型
+        self._sent: Dict[str, str] = dict(topics)
+        self._props['label'] = label
+        self._props['topics'] = topics
+
+        def handle_select(e):
+            self.value = e.args
+            if on_select is not None:
+                on_select(e.args)
+
+        self.on('select', handle_select)
+
+    def sync(self):
+        """索引版本变化时向浏览器下发差异"""
+        if self.version == self.topic_index.version:
+            return
+        topics, self.version = self.topic_index.snapshot()
+        latest = dict(topics)
+        removed = [name for name in self._sent if name not in latest]
+        added = [(name, topic_type) for name, topic_type in topics if self._sent.get(name) != topic_type]
+        self._sent = latest
+        if self.value not in latest:
+            self.value = None
+        if added or removed:
+            self.run_method('applyDiff', added, removed)
@@ -0,0 +1,174 @@
+"""
+图像topic录像 - 在独立线程中将图像消息编码为MP4
+接收端只把原始消息放入有界队列，编码跟不上时丢弃新帧而不阻塞消息接收；
+每一帧的时间写入同名的CSV时间戳文件，保证帧时间准确
+"""
+import os
+import csv
+import queue
+import threading
+import time
+import logging
+from typing import Optional, Dict, Any
+
+import cv2
+
+from ui_function.image_process import process_image_message, ImageBufferPool
+
+
+# 默认的录像保存目录（相对于项目根目录）
+DEFAULT_RECORD_DIR = 'recordings'
+
+
+class VideoRecorder:
+    """图像topic录像器"""
+
+    def __init__(self, output_path: str, fps: float = 30.0, queue_size: int = 30, fourcc: str = 'mp4v'):
+        """初始化录像器
+
+        Args:
+            output_path: 输出MP4文件路径
+            fps: 写入视频文件的名义帧率，实际帧时间以时间戳文件为准
+            queue_size: 待编码队列长度
+            fourcc: 编码器FourCC
+        """
+        self.output_path = output_path
+        self.timestamp_path = os.path.splitext(output_path)[0] + '.csv'
+        self.fps = fps
+        self.fourcc = fourcc
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.frames_written = 0
+        self.frames_dropped = 0
+        # 录像失败的原因，None表示正常
+        self.error = None
+        self._writer = None
+        self._frame_size = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        # 只在编码线程中使用
+        self.image_pool = ImageBufferPool('video_recorder')
+
+    @property
+    def is_recording(self) -> bool:
+        """是否正在录像"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """启动编码线程
+
+        Returns:
+            bool: 是否成功启动
+        """
+        if self.is_recording:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._encode_loop, name='video-recorder', daemon=True)
+        self._thread.start()
+        logging.info(f"开始录像: {self.output_path}")
+        return True
+
+    def stop(self):
+        """停止录像，等待队列中已有的帧编码完成"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        logging.info(f"录像结束: {self.output_path}，写入 {self.frames_written} 帧，丢弃 {self.frames_dropped} 帧")
+
+    def add_message(self, msg: Dict[str, Any]) -> bool:
+        """加入一帧图像消息，不阻塞调用方
+
+        Args:
+            msg: sensor_msgs/Image消息
+
+        Returns:
+            bool: 是否加入队列，队列已满时丢弃并返回False
+        """
+        if self._stop_event.is_set():
+            return False
+        try:
+            self.frame_queue.put_nowait((time.time(), msg))
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def _encode_loop(self):
+        """后台线程：转换图像并写入视频文件"""
+        with open(self.timestamp_path, 'w', newline='') as timestamp_file:
+            timestamp_writer = csv.writer(timestamp_file)
+            timestamp_writer.writerow(['frame', 'receive_time', 'stamp_sec', 'stamp_nanosec'])
+            try:
+                while not (self._stop_event.is_set() and self.frame_queue.empty()):
+                    try:
+                        receive_time, msg = self.frame_queue.get(timeout=0.2)
+                    except queue.Empty:
+                        continue
+
+                    img = process_image_message(msg, self.image_pool)
+                    if img is None:
+                        self.frames_dropped += 1
+                        continue
+                    if not self._write_frame(img):
+                        self.frames_dropped += 1
+                        if self.error is not None:
+                            # 无法创建视频文件，丢弃剩余帧并结束
+                            self.frames_dropped += self.frame_queue.qsize()
+                            break
+                        continue
+
+                    stamp = msg.get('header', {}).get('stamp', {})
+                    timestamp_writer.writerow([self.frames_written, f"{receive_time:.6f}",
+                                               stamp.get('sec', ''), stamp.get('nanosec', '')])
+                    self.frames_written += 1
+            except Exception as e:
+                logging.error(f"录像编码失败: {e}")
+                self.error = str(e)
+            finally:
+                if self._writer is not None:
+                    self._writer.release()
+                    self._writer = None
+
+    def _write_frame(self, img) -> bool:
+        """写入一帧，第一帧决定视频尺寸"""
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        height, width = img.shape[:2]
+
+        if self._writer is None:
+            self._frame_size = (width, height)
+            self._writer = cv2.VideoWriter(self.output_path, cv2.VideoWriter_fourcc(*self.fourcc),
+                                           self.fps, self._frame_size)
+            if not self._writer.isOpened():
+                logging.error(f"无法创建视频文件: {self.output_path}")
+                self._writer = None
+                self.error = f"无法创建视频文件: {self.output_path}"
+                self._stop_event.set()
+                return False
+
+        if (width, height) != self._frame_size:
+            img = cv2.resize(img, self._frame_size)
+        self._writer.write(img)
+        return True
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取录像状态
+
+        Returns:
+            Dict[str, Any]: 包含输出路径、已写入帧数、丢弃帧数、队列长度和错误信息
+        """
+        return {
+            'output_path': self.output_path,
+            'recording': self.is_recording,
+            'error': self.error,
+            'frames_written': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'queue_size': self.frame_queue.qsize(),
+        }
+
+
+def make_record_path(topic_name: str, record_dir: str = DEFAULT_RECORD_DIR) -> str:
+    """根据topic名称和当前时间生成录像文件路径"""
+    safe_name = topic_name.strip('/').replace('/', '_') or 'image'
+    return os.path.join(record_dir, f"{safe_name}_{time.strftime('%Y%m%d_%H%M%S')}.mp4")